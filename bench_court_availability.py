@@ -0,0 +1,129 @@
+"""
+Benchmark get_all_available_courts_db on a club with a long booking history.
+
+Seeds a club with courts and thousands of past activity records in the
+configured database, creates the indexes and times the previous start_datetime
+range query with its list scan against the overlap query. Also counts the courts
+the previous query reported available although a booking that started before
+the window was still running.
+
+    python bench_court_availability.py --courts 20 --records 5000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from bson.objectid import ObjectId
+
+import booking
+import repository
+
+HOUR = 3600
+
+
+async def seed_club(no_courts: int, no_records: int, rng: random.Random):
+    """
+    Insert courts and hour and a half long bookings spread over the past year.
+    Returns:
+        club_id: str, now: int
+    """
+
+    club_id = f"bench_{ObjectId()}"
+    court_ids = [ObjectId() for _ in range(no_courts)]
+    await repository.courts.insert_many(
+        [{"_id": court_id, "club_id": club_id} for court_id in court_ids]
+    )
+    now = int(time.time())
+    records = []
+    for _ in range(no_records):
+        start = now - rng.randrange(365 * 24) * HOUR
+        records.append(
+            {
+                "club_id": club_id,
+                "activity_type": "tournament",
+                "start_datetime": start,
+                "end_datetime": start + 3 * HOUR // 2,
+                "court_ids": [
+                    str(court_id) for court_id in rng.sample(court_ids, k=2)
+                ],
+            }
+        )
+    await repository.activity_records.insert_many(records)
+    return club_id, now
+
+
+async def drop_club(club_id: str):
+    await repository.courts.delete_many({"club_id": club_id})
+    await repository.activity_records.delete_many({"club_id": club_id})
+
+
+async def previous_available_courts(
+    club_id: str, start_datetime: int, end_datetime: int
+):
+    court_infos = await repository.courts.find({"club_id": club_id})
+    activity_record_infos = await repository.activity_records.find(
+        {
+            "club_id": club_id,
+            "start_datetime": {"$gte": start_datetime, "$lte": end_datetime},
+        },
+        {"court_ids": 1},
+    )
+    court_ids = []
+    for item in activity_record_infos:
+        court_ids.extend(item["court_ids"])
+    return [court for court in court_infos if str(court["_id"]) not in court_ids]
+
+
+async def time_query(query, club_id: str, windows, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for window_start, window_end in windows:
+            await query(club_id, window_start, window_end)
+    return (time.perf_counter() - start) / (repeat * len(windows))
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courts", type=int, default=20)
+    parser.add_argument("--records", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    await repository.ensure_indexes()
+    rng = random.Random(args.seed)
+    for no_records in args.records:
+        club_id, now = await seed_club(args.courts, no_records, rng)
+        try:
+            windows = [
+                (start, start + HOUR)
+                for start in (now - rng.randrange(365 * 24) * HOUR for _ in range(10))
+            ]
+            # Bookings that started before a window are only found by the overlap
+            missed = 0
+            for window_start, window_end in windows:
+                missed += len(
+                    await previous_available_courts(club_id, window_start, window_end)
+                ) - len(
+                    await booking.get_all_available_courts_db(
+                        club_id, window_start, window_end
+                    )
+                )
+            previous = await time_query(
+                previous_available_courts, club_id, windows, args.repeat
+            )
+            overlap = await time_query(
+                booking.get_all_available_courts_db, club_id, windows, args.repeat
+            )
+            print(
+                f"records {no_records:>6} | previous {previous * 1000:>7.2f} ms | "
+                f"overlap {overlap * 1000:>7.2f} ms | "
+                f"booked courts reported available before {missed}"
+            )
+        finally:
+            await drop_club(club_id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,207 @@
+"""
+Benchmark a slotted match model against the plain match documents the backend
+uses.
+
+Builds the full schedule of an americano event, 64 players and 63 rounds by
+default, and reports the memory held by the rounds as documents and as Match
+models, the time to convert between the two, and the time to score every match
+in memory with build_score_update, on the documents and through the model. No
+database is needed.
+
+The backend keeps the documents. Rounds are stored and read in the document
+shape and the score path only reads the one match it scores, so a model saves
+memory only while a whole schedule is held, and every read and write pays the
+conversion on top.
+
+    python bench_domain_model.py --players 64
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import Optional
+
+import tournament_backend_final as backend
+
+
+class Team:
+    """
+    One side of a match, player_1 and player_2 are the two players or the two
+    players of the team.
+    """
+
+    __slots__ = ("player_1", "player_2", "team_score")
+
+    def __init__(self, player_1, player_2, team_score: int = 0):
+        self.player_1 = player_1
+        self.player_2 = player_2
+        self.team_score = team_score
+
+    def to_document(self):
+        return {
+            "player_1": self.player_1,
+            "player_2": self.player_2,
+            "team_score": self.team_score,
+        }
+
+    @classmethod
+    def from_document(cls, document):
+        return cls(document["player_1"], document["player_2"], document["team_score"])
+
+
+class Match:
+    """
+    A scheduled match between two teams on a court.
+    """
+
+    __slots__ = ("court_info", "teams", "winner")
+
+    def __init__(self, court_info, teams, winner: Optional[str] = None):
+        self.court_info = court_info
+        self.teams = teams
+        self.winner = winner
+
+    def to_document(self):
+        return {
+            "court_info": self.court_info,
+            "teams": [team.to_document() for team in self.teams],
+            "winner": self.winner,
+        }
+
+    @classmethod
+    def from_document(cls, document):
+        return cls(
+            document["court_info"],
+            tuple(Team.from_document(team) for team in document["teams"]),
+            document["winner"],
+        )
+
+
+def rounds_to_documents(rounds):
+    return [[match.to_document() for match in _round] for _round in rounds]
+
+
+def rounds_from_documents(rounds):
+    return [[Match.from_document(match) for match in _round] for _round in rounds]
+
+
+def copy_rounds(rounds):
+    return [
+        [dict(match, teams=[dict(team) for team in match["teams"]]) for match in _round]
+        for _round in rounds
+    ]
+
+
+def held_bytes(build, *args):
+    """
+    Returns:
+        result, bytes held by the result
+    """
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(*args)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, held
+
+
+def best_time(call, *args):
+    """
+    Returns:
+        seconds of the best of three calls
+    """
+
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        call(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+async def score_event(rounds, players, through_model: bool):
+    """
+    Score every match of the event in memory, through the model if through_model,
+    converting the scored match to a Match and back as a model backed score
+    path would.
+    Returns:
+        seconds
+    """
+
+    words = await backend.get_no_of_result_words(len(rounds), len(rounds[0]))
+    tournament_info = {
+        "tournament_type": "Americano",
+        "no_rounds": len(rounds),
+        "match_per_round": len(rounds[0]),
+        "rounds": copy_rounds(rounds),
+        "summary": [
+            {
+                "player_info": [{"player_id": player, "name": player, "photo_url": ""}],
+                "matches_played": 0,
+                "matches_won": 0,
+                "matches_drawn": 0,
+                "matches_lost": 0,
+                "results": [0] * words,
+                "points_won": 0,
+                "points_lost": 0,
+                "total_points_played": 0,
+                "arrived": False,
+            }
+            for player in players
+        ],
+    }
+    participant_index = await backend.get_participant_index(players)
+    start = time.perf_counter()
+    for round_idx, _round in enumerate(tournament_info["rounds"]):
+        for match_idx in range(len(_round)):
+            if through_model:
+                match = Match.from_document(_round[match_idx])
+                _round[match_idx] = match.to_document()
+            await backend.build_score_update(
+                "bench",
+                tournament_info,
+                participant_index,
+                round_idx,
+                match_idx,
+                20,
+                12,
+            )
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=64)
+    args = parser.parse_args()
+
+    players = [f"player_{i}" for i in range(args.players)]
+    court_ids = [f"court_{i}" for i in range(args.players // 4)]
+    documents = await backend.make_rounds(
+        "Americano", players, court_ids, len(court_ids)
+    )
+    no_matches = sum(len(_round) for _round in documents)
+
+    copies, document_bytes = held_bytes(copy_rounds, documents)
+    models, model_bytes = held_bytes(rounds_from_documents, documents)
+    assert rounds_to_documents(models) == documents
+    print(f"players {args.players} | rounds {len(documents)} | matches {no_matches}")
+    print(
+        f"documents {document_bytes / 1024:>8.1f} KiB | "
+        f"models {model_bytes / 1024:>8.1f} KiB"
+    )
+    print(
+        f"to documents {best_time(rounds_to_documents, models) * 1000:>7.2f} ms | "
+        f"from documents {best_time(rounds_from_documents, documents) * 1000:>7.2f} ms"
+    )
+
+    for label, through_model in (("documents", False), ("model", True)):
+        elapsed = await score_event(documents, players, through_model)
+        print(
+            f"score every match on {label:<9} {elapsed * 1000:>7.2f} ms | "
+            f"{elapsed / no_matches * 1e6:>7.1f} us/match"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Benchmark the live feed fan-out.
+
+Subscribes thousands of readers to one tournament and publishes a stream of
+score deltas from an in-process publisher, the way update_score_db does after a
+write. Reports the publish time per event, the time until every reader has
+received the last event, and how many slow readers were sent a resync. No
+database is needed.
+
+    python bench_live_feed.py --subscribers 1000 5000 --events 200
+"""
+import argparse
+import asyncio
+import time
+
+import live_feed
+
+
+async def read(subscription: live_feed.Subscription, no_events: int, slow: bool):
+    """
+    Read until the last event or a resync.
+    Returns:
+        bool, True if the reader had to resync
+    """
+
+    received = 0
+    while received < no_events:
+        event = await subscription.get()
+        if event["type"] == live_feed.RESYNC:
+            return True
+        received = event["seq"]
+        if slow:
+            await asyncio.sleep(0.001)
+    return False
+
+
+async def publish(feed: live_feed.LiveFeed, no_events: int):
+    """
+    Publish score deltas, yielding to the readers now and then like writes do.
+    Returns:
+        seconds spent publishing
+    """
+
+    elapsed = 0.0
+    for event_idx in range(no_events):
+        start = time.perf_counter()
+        feed.publish(
+            "bench",
+            "score",
+            round_idx=event_idx // 8,
+            match_idx=event_idx % 8,
+            team_1_score=event_idx % 21,
+            team_2_score=21 - event_idx % 21,
+            winner="Team 1",
+        )
+        elapsed += time.perf_counter() - start
+        if event_idx % 8 == 7:
+            await asyncio.sleep(0)
+    return elapsed
+
+
+async def run(no_subscribers: int, no_events: int, slow_every: int, maxsize: int):
+    feed = live_feed.LiveFeed(maxsize=maxsize)
+    subscriptions = [feed.subscribe("bench") for _ in range(no_subscribers)]
+    readers = [
+        asyncio.ensure_future(
+            read(subscription, no_events, slow_every and idx % slow_every == 0)
+        )
+        for idx, subscription in enumerate(subscriptions)
+    ]
+    start = time.perf_counter()
+    publishing = await publish(feed, no_events)
+    resynced = sum(await asyncio.gather(*readers))
+    delivered = time.perf_counter() - start
+    for subscription in subscriptions:
+        subscription.close()
+    assert feed.subscriber_count() == 0
+    print(
+        f"subscribers {no_subscribers:>6} | events {no_events:>4} | "
+        f"publish {publishing / no_events * 1e6:>8.1f} us/event | "
+        f"all delivered {delivered * 1000:>8.1f} ms | resynced {resynced}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--subscribers", type=int, nargs="+", default=[100, 1000, 5000]
+    )
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument(
+        "--slow-every", type=int, default=100, help="every nth reader is slow"
+    )
+    parser.add_argument("--maxsize", type=int, default=64)
+    args = parser.parse_args()
+
+    for no_subscribers in args.subscribers:
+        await run(no_subscribers, args.events, args.slow_every, args.maxsize)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""
+Benchmark the mexicano pairing engine against the fixed block pairing.
+
+Simulates full mexicano tournaments with random scores and reports, for both
+mexicano and balanced_mexicano, the time to pair one round, the number of repeated
+partnerships and repeated opponents and the mean point difference between the two
+sides of a match.
+
+    python bench_mexicano_pairing.py --players 8 16 32 64 --tournaments 20
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter
+
+import tournament_backend_final as backend
+
+
+async def simulate(pair, no_players: int, no_rounds: int, rng: random.Random):
+    """
+    Play a mexicano tournament with random scores.
+    Args:
+        pair: async (player_score, rounds) -> matches
+        no_players: int
+        no_rounds: int
+        rng: random.Random
+    Returns:
+        pairing time per round, repeated partners, repeated opponents, mean spread
+    """
+
+    player_score = [[f"player_{i}", 0] for i in range(no_players)]
+    rounds = []
+    elapsed = 0.0
+    spreads = []
+    for _ in range(no_rounds):
+        start = time.perf_counter()
+        matches = await pair(player_score, rounds)
+        elapsed += time.perf_counter() - start
+        rounds.extend(await backend.mexicano_rounds(matches, ["court"], 1, False))
+
+        scores = dict(player_score)
+        for match in matches:
+            spreads.append(
+                abs(
+                    sum(scores[player] for player in match[0])
+                    - sum(scores[player] for player in match[1])
+                )
+            )
+            team_1_score = rng.randint(0, 32)
+            for player in match[0]:
+                scores[player] += team_1_score
+            for player in match[1]:
+                scores[player] += 32 - team_1_score
+        player_score = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        player_score = [list(item) for item in player_score]
+
+    partners = Counter()
+    opponents = Counter()
+    for _round in rounds:
+        for match in _round:
+            team_1, team_2 = (
+                (_team["player_1"], _team["player_2"]) for _team in match["teams"]
+            )
+            for _team in (team_1, team_2):
+                partners[frozenset(_team)] += 1
+            for player_1 in team_1:
+                for player_2 in team_2:
+                    opponents[frozenset((player_1, player_2))] += 1
+    return (
+        elapsed / no_rounds,
+        sum(count - 1 for count in partners.values()),
+        sum(count - 1 for count in opponents.values()),
+        statistics.mean(spreads),
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--tournaments", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engines = {
+        "mexicano": lambda player_score, rounds: backend.mexicano(player_score),
+        "balanced": lambda player_score, rounds: backend.balanced_mexicano(
+            player_score, rounds=rounds
+        ),
+    }
+    for no_players in args.players:
+        for name, pair in engines.items():
+            rng = random.Random(args.seed)
+            results = [
+                await simulate(pair, no_players, no_players - 1, rng)
+                for _ in range(args.tournaments)
+            ]
+            timing, partners, opponents, spread = (
+                statistics.mean(column) for column in zip(*results)
+            )
+            print(
+                f"{name:>8} | players {no_players:>3} | "
+                f"{timing * 1000:>7.2f} ms/round | "
+                f"repeat partners {partners:>6.1f} | "
+                f"repeat opponents {opponents:>6.1f} | "
+                f"spread {spread:>5.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+"""
+Benchmark americano schedule creation against per-count schedule templates.
+
+A template holds the rotation of a number of participants as player positions,
+made once and gathered from with numpy indexing. make_rounds runs the closed form
+rotation per call instead. Both are timed for a whole schedule and for the single
+round a lazily created schedule adds, and checked to give the same matches and
+courts. Also times making every template up to 128 players. No database is
+needed.
+
+make_rounds keeps the rotation. Building the match documents dominates either
+way. The templates only win on whole Americano schedules, while schedules are
+created a round at a time, where they are slower, as they are for Team
+Americano.
+
+    python bench_schedule_template.py --players 8 32 64 128
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, List
+
+import numpy as np
+
+import tournament_backend_final as backend
+
+# Templates by (tournament_type, number of participants)
+_templates = {}
+
+
+async def get_template(tournament_type: str, no_participants: int):
+    """
+    Get the rotation of a number of participants as player positions, a team
+    takes the positions 2 * team and 2 * team + 1.
+    Returns:
+        matches: np.ndarray of shape (matches, 2, 2)
+        offsets: np.ndarray of shape (rounds + 1,), first match of every round
+    """
+
+    template = _templates.get((tournament_type, no_participants))
+    if template is not None:
+        return template
+
+    positions: List[Any] = list(range(no_participants))
+    if no_participants % 2 != 0:
+        positions.append(None)
+    matches = []
+    offsets = [0]
+    for round_idx in range(len(positions) - 1):
+        if tournament_type == "Americano":
+            round_matches = await backend.americano_round(positions, round_idx)
+        else:
+            round_matches = [
+                [(2 * team, 2 * team + 1) for team in match]
+                for match in await backend.team_americano_round(positions, round_idx)
+            ]
+        matches.extend(round_matches)
+        offsets.append(len(matches))
+    template = (
+        np.array(matches, dtype=np.intp).reshape(-1, 2, 2),
+        np.array(offsets, dtype=np.intp),
+    )
+    _templates[(tournament_type, no_participants)] = template
+    return template
+
+
+async def template_rounds(
+    tournament_type, players, court_ids, no_courts, round_start=0, round_end=None
+):
+    """
+    make_rounds for americano, gathered from the template.
+    """
+
+    template, offsets = await get_template(tournament_type, len(players))
+    no_rounds = len(offsets) - 1
+    round_end = no_rounds if round_end is None else min(round_end, no_rounds)
+    if round_start >= round_end:
+        return []
+
+    player_ids = np.empty(
+        len(players) * (2 if tournament_type == "Team Americano" else 1), dtype=object
+    )
+    if tournament_type == "Team Americano":
+        player_ids[0::2] = [team[0] for team in players]
+        player_ids[1::2] = [team[1] for team in players]
+    else:
+        player_ids[:] = players
+    first_match, last_match = offsets[round_start], offsets[round_end]
+    sides = player_ids[template[first_match:last_match]].tolist()
+    courts = np.empty(no_courts, dtype=object)
+    courts[:] = court_ids[:no_courts]
+    match_courts = courts[np.arange(first_match, last_match) % no_courts].tolist()
+
+    matches = [
+        {
+            "court_info": court,
+            "teams": [
+                {"player_1": side_1[0], "player_2": side_1[1], "team_score": 0},
+                {"player_1": side_2[0], "player_2": side_2[1], "team_score": 0},
+            ],
+            "winner": None,
+        }
+        for court, (side_1, side_2) in zip(match_courts, sides)
+    ]
+    return [
+        matches[offsets[round_idx] - first_match : offsets[round_idx + 1] - first_match]
+        for round_idx in range(round_start, round_end)
+    ]
+
+
+async def best_of(repeat: int, build, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await build(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, nargs="+", default=[8, 32, 64, 128])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for no_participants in range(2, 129):
+        await get_template("Americano", no_participants)
+        await get_template("Team Americano", no_participants)
+    print(f"every template up to 128 players {time.perf_counter() - start:.2f} s")
+
+    for tournament_type in ("Americano", "Team Americano"):
+        for no_players in args.players:
+            players = [f"player_{i}" for i in range(no_players)]
+            if tournament_type == "Team Americano":
+                players = [players[i : i + 2] for i in range(0, no_players, 2)]
+            court_ids = [f"court_{i}" for i in range(max(1, no_players // 4))]
+            one_round = (len(players) // 2, len(players) // 2 + 1)
+            for round_range in ((0, None), one_round):
+                assert await template_rounds(
+                    tournament_type, players, court_ids, len(court_ids), *round_range
+                ) == await backend.make_rounds(
+                    tournament_type, players, court_ids, len(court_ids), *round_range
+                )
+
+            timings = [
+                await best_of(
+                    args.repeat,
+                    build,
+                    tournament_type,
+                    players,
+                    court_ids,
+                    len(court_ids),
+                    *round_range,
+                )
+                for round_range in ((0, None), one_round)
+                for build in (backend.make_rounds, template_rounds)
+            ]
+            print(
+                f"{tournament_type:>14} | players {no_players:>3} | "
+                f"rotation {timings[0] * 1000:>7.2f} ms | "
+                f"template {timings[1] * 1000:>7.2f} ms | "
+                f"one round {timings[2] * 1e6:>7.1f} us / {timings[3] * 1e6:>7.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
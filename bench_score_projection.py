@@ -0,0 +1,198 @@
+"""
+Benchmark what a score update reads.
+
+Seeds americano records of 8, 32 and 64 players with every round stored in the
+configured database and reports, per update, the bson bytes returned by
+tournament_matchmakings and the time of:
+
+- full read: the full record read by get_tournament_info, what a score read
+  before get_score_context
+- score: update_score_db end to end, the projection read and the write
+- score with feed: update_score_db with a live feed subscriber, which adds the
+  update_rankings read and write
+- score and brackets: update_score_db followed by get_tournament_brackets_db,
+  which ranks the summary and stores the rankings after every score
+
+    python bench_score_projection.py --players 8 32 64
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import bson
+from bson.objectid import ObjectId
+
+import live_feed
+import repository
+import tournament_backend_final as backend
+
+
+def encoded_size(document):
+    """
+    Bson size of a document, integer keys of sparse records are encoded as text.
+    """
+
+    def with_text_keys(value):
+        if isinstance(value, dict):
+            return {str(key): with_text_keys(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [with_text_keys(item) for item in value]
+        return value
+
+    return len(bson.encode(with_text_keys(document)))
+
+
+async def seed_record(no_players: int):
+    """
+    Insert a matchmaking record with every round of an americano event stored.
+    Returns:
+        activity_record_id: str, rounds
+    """
+
+    activity_record_id = f"bench_{ObjectId()}"
+    players = [f"player_{i}" for i in range(no_players)]
+    court_ids = [f"court_{i}" for i in range(no_players // 4)]
+    rounds = await backend.make_rounds("Americano", players, court_ids, len(court_ids))
+    summary = [
+        {
+            "player_info": [{"player_id": player, "name": player, "photo_url": ""}],
+            "matches_played": 0,
+            "matches_won": 0,
+            "matches_drawn": 0,
+            "matches_lost": 0,
+            "results": [],
+            "points_won": 0,
+            "points_lost": 0,
+            "total_points_played": 0,
+            "arrived": False,
+        }
+        for player in players
+    ]
+    await repository.tournament_matchmakings.insert_one(
+        {
+            "activity_record_id": activity_record_id,
+            "record": {
+                "tournament_type": "Americano",
+                "no_rounds": len(rounds),
+                "match_per_round": len(rounds[0]),
+                "court_ids": court_ids,
+                "participants": players,
+                "rounds": rounds,
+                "summary": summary,
+                "standings": [
+                    {"participant": idx, "points": 0, "rank": idx + 1}
+                    for idx in range(no_players)
+                ],
+                "leaderboard": await backend.brackets_from_summary(summary),
+                "summary_version": 0,
+                "standings_version": 0,
+            },
+        }
+    )
+    return activity_record_id, rounds
+
+
+class CountingCollection(repository.AsyncCollection):
+    """
+    tournament_matchmakings collection that counts the bson bytes its calls return.
+    """
+
+    def __init__(self):
+        super().__init__(repository.tournament_matchmakings.collection_name)
+        self.bytes_read = 0
+
+    async def _run(self, func, *args, **kwargs):
+        result = await super()._run(func, *args, **kwargs)
+        if isinstance(result, dict):
+            self.bytes_read += encoded_size(result)
+        elif isinstance(result, list):
+            self.bytes_read += sum(encoded_size(document) for document in result)
+        return result
+
+
+async def time_calls(call, matches, collection: CountingCollection):
+    """
+    Returns:
+        mean bson bytes read, seconds per call
+    """
+
+    collection.bytes_read = 0
+    start = time.perf_counter()
+    for round_idx, match_idx, team_1_score, team_2_score in matches:
+        await call(round_idx, match_idx, team_1_score, team_2_score)
+    return (
+        collection.bytes_read / len(matches),
+        (time.perf_counter() - start) / len(matches),
+    )
+
+
+async def run(no_players: int, no_updates: int, rng: random.Random):
+    """
+    Score the same matches of a fresh record per mode.
+    """
+
+    collection = CountingCollection()
+    stored_collection = repository.tournament_matchmakings
+    repository.tournament_matchmakings = collection
+    activity_record_ids = []
+    matches = None
+    try:
+        print(f"players {no_players}")
+        for mode in ("full read", "score", "score with feed", "score and brackets"):
+            activity_record_id, rounds = await seed_record(no_players)
+            activity_record_ids.append(activity_record_id)
+            if matches is None:
+                matches = rng.sample(
+                    [
+                        (round_idx, match_idx, points, 32 - points)
+                        for round_idx, _round in enumerate(rounds)
+                        for match_idx in range(len(_round))
+                        for points in [rng.randrange(33)]
+                    ],
+                    min(no_updates, len(rounds) * len(rounds[0])),
+                )
+
+            async def call(round_idx, match_idx, team_1_score, team_2_score):
+                if mode == "full read":
+                    backend.cache.invalidate_tournament(activity_record_id)
+                    await backend.get_tournament_info(activity_record_id)
+                    return
+                await backend.update_score_db(
+                    activity_record_id,
+                    round_idx,
+                    match_idx,
+                    team_1_score,
+                    team_2_score,
+                )
+                if mode == "score and brackets":
+                    await backend.get_tournament_brackets_db(activity_record_id)
+
+            if mode == "score with feed":
+                with live_feed.feed.subscribe(activity_record_id):
+                    size, seconds = await time_calls(call, matches, collection)
+            else:
+                size, seconds = await time_calls(call, matches, collection)
+            print(f"  {mode:<18} {size / 1024:>8.1f} KiB {seconds * 1000:>7.2f} ms")
+    finally:
+        repository.tournament_matchmakings = stored_collection
+        for activity_record_id in activity_record_ids:
+            await repository.tournament_matchmakings.delete_one(
+                {"activity_record_id": activity_record_id}
+            )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--updates", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for no_players in args.players:
+        await run(no_players, args.updates, rng)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+"""
+Benchmark concurrent update_score_db throughput.
+
+Seeds an Americano tournament in the configured database, submits every match
+score of the schedule concurrently and reports updates per second together with
+the worst event loop stall seen while the updates were running. Each size is run
+once with blocking pymongo calls on the event loop and once through the
+repository thread pool.
+
+    python bench_update_score.py --players 8 32 64
+"""
+import argparse
+import asyncio
+import time
+
+from bson.objectid import ObjectId
+
+import repository
+import tournament_backend_final as backend
+
+
+async def seed_tournament(no_players: int):
+    """
+    Insert the booking, activity record and players for a benchmark tournament.
+    Args:
+        no_players: int
+    Returns:
+        activity_record_id: str
+    """
+
+    activity_id = ObjectId()
+    activity_record_id = ObjectId()
+    players = [f"bench_{activity_record_id}_{i}" for i in range(no_players)]
+    await repository.players.insert_many(
+        [{"_id": player, "name": player, "photo_url": ""} for player in players]
+    )
+    await repository.tournaments.insert_one(
+        {
+            "_id": activity_id,
+            "tournament_type": "Americano",
+            "no_of_players": no_players,
+            "number_of_points": 32,
+        }
+    )
+    await repository.activity_records.insert_one(
+        {
+            "_id": activity_record_id,
+            "club_id": "bench",
+            "activity_id": str(activity_id),
+            "activity_type": "tournament",
+            "players": players,
+            "court_ids": [str(ObjectId()) for _ in range(no_players // 4)],
+        }
+    )
+    await backend.create_activity_history(str(activity_record_id))
+    return str(activity_record_id)
+
+
+async def drop_tournament(activity_record_id: str):
+    """
+    Remove everything seed_tournament inserted.
+    Args:
+        activity_record_id: str
+    """
+
+    activity_record = await repository.activity_records.find_one(
+        {"_id": ObjectId(activity_record_id)}
+    )
+    await repository.players.delete_many({"_id": {"$in": activity_record["players"]}})
+    await repository.tournaments.delete_one(
+        {"_id": ObjectId(activity_record["activity_id"])}
+    )
+    await repository.activity_records.delete_one({"_id": ObjectId(activity_record_id)})
+    await repository.tournament_matchmakings.delete_one(
+        {"activity_record_id": activity_record_id}
+    )
+
+
+async def watch_loop(stop: asyncio.Event, interval: float = 0.001):
+    """
+    Measure the longest time the event loop could not run this task.
+    Returns:
+        worst stall in seconds
+    """
+
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(no_players: int, blocking: bool):
+    repository.configure(blocking=blocking)
+    activity_record_id = await seed_tournament(no_players)
+    try:
+        no_rounds = await backend.get_no_of_rounds("Americano", no_players)
+        match_per_round = int(
+            await backend.get_match_per_round("Americano", no_players)
+        )
+        stop = asyncio.Event()
+        watcher = asyncio.create_task(watch_loop(stop))
+        start = time.perf_counter()
+        winners = await asyncio.gather(
+            *(
+                backend.update_score_db(
+                    activity_record_id, round_idx, match_idx, 20, 12
+                )
+                for round_idx in range(no_rounds)
+                for match_idx in range(match_per_round)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        assert all(winner == "Team 1" for winner in winners), winners
+        stop.set()
+        worst_stall = await watcher
+        updates = no_rounds * match_per_round
+        print(
+            f"{'blocking' if blocking else 'threaded':>8} | players {no_players:>3} | "
+            f"{updates:>5} updates | {updates / elapsed:>8.1f} updates/s | "
+            f"worst loop stall {worst_stall * 1000:>7.1f} ms"
+        )
+    finally:
+        await drop_tournament(activity_record_id)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, nargs="+", default=[8, 32, 64])
+    args = parser.parse_args()
+    for no_players in args.players:
+        for blocking in (True, False):
+            await run(no_players, blocking)
+    repository.configure()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
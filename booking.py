@@ -1,28 +1,55 @@
 ############################
 #       Join Request       #
 ############################
-async def get_requests_list_db(activity_record_id: str, activity: str):
-    """Get all join requests.
+def pending_requests_filter(activity_record_id: str, activity: str):
+    return {
+        "activity_record_id": activity_record_id,
+        "activity": activity,
+        "payment_method": "PAY LATER",
+        "join_request": "PENDING",
+    }
+
+
+async def get_requests_list_db(
+    activity_record_id: str,
+    activity: str,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+):
+    """Get pending join requests, oldest first, a page at a time.
+
+    Pages are read from the (activity_record_id, activity, payment_method,
+    join_request, _id) index, the activity_joins_id of the last request of a page
+    is the cursor of the next one.
 
     Args:
         activity_record_id: str
+        activity: str
+        after: Optional[str], activity_joins_id the page starts after
+        limit: Optional[int], all remaining requests if None
 
     Returns:
         Union[str, List[str]]
     """
     try:
-        players = list(
-            mongodb_client[DBInfo.database][CollInfo.activity_joins].find(
-                {
-                    "activity_record_id": activity_record_id,
-                    "activity": activity,
-                    "payment_method": "PAY LATER",
-                    "join_request": "PENDING",
-                },
-                {"team": 1, "player_ids": 1},
-            )
+        await repository.ensure_indexes()
+        requests_filter = pending_requests_filter(activity_record_id, activity)
+        if after is not None:
+            requests_filter["_id"] = {"$gt": ObjectId(after)}
+        players = await repository.activity_joins.find(
+            requests_filter,
+            {"team": 1, "player_ids": 1},
+            sort=[("_id", 1)],
+            limit=limit or 0,
         )
         if players:
+            player_infos = await internal.get_player_infos(
+                [
+                    player_id
+                    for player in players
+                    for player_id in player["player_ids"][: 2 if player["team"] else 1]
+                ]
+            )
             activity_joins = []
             for player in players:
                 if player["team"]:
@@ -30,8 +57,8 @@ async def get_requests_list_db(activity_record_id: str, activity: str):
                         {
                             "activity_joins_id": str(player["_id"]),
                             "player_infos": [
-                                await internal.get_player_info(player["player_ids"][0]),
-                                await internal.get_player_info(player["player_ids"][1]),
+                                player_infos[player["player_ids"][0]],
+                                player_infos[player["player_ids"][1]],
                             ],
                         }
                     )
@@ -39,9 +66,7 @@ async def get_requests_list_db(activity_record_id: str, activity: str):
                     activity_joins.append(
                         {
                             "activity_joins_id": str(player["_id"]),
-                            "player_infos": [
-                                await internal.get_player_info(player["player_ids"][0])
-                            ],
+                            "player_infos": [player_infos[player["player_ids"][0]]],
                         }
                     )
             return activity_joins
@@ -51,39 +76,224 @@ async def get_requests_list_db(activity_record_id: str, activity: str):
         utils.raise_exception(e=e)
 
 
+def join_participant(activity_joins_doc):
+    """Participant a join request adds, a list of player ids for a team.
+
+    Args:
+        activity_joins_doc: activity_joins document
+
+    Returns:
+        Union[str, List[str]]
+    """
+
+    if activity_joins_doc["team"]:
+        return activity_joins_doc["player_ids"]
+    return activity_joins_doc["player_ids"][0]
+
+
+def get_rosters(activity_records_ids: List[ObjectId], session=None):
+    """Get the players and capacity of activities inside a transaction.
+
+    Args:
+        activity_records_ids: List[ObjectId]
+        session: ClientSession
+
+    Returns:
+        Dict: activity_records_id to {"players": List, "no_of_players": int}
+    """
+
+    activities = repository.activity_records.collection.aggregate(
+        [
+            {"$match": {"_id": {"$in": activity_records_ids}}},
+            {
+                "$project": {
+                    "players": 1,
+                    "activity_id": {"$toObjectId": "$activity_id"},
+                }
+            },
+            # localField together with a pipeline needs MongoDB 5.0
+            {
+                "$lookup": {
+                    "from": repository.tournaments.collection_name,
+                    "localField": "activity_id",
+                    "foreignField": "_id",
+                    "pipeline": [{"$project": {"no_of_players": 1}}],
+                    "as": "activity_booking",
+                }
+            },
+        ],
+        session=session,
+    )
+    rosters = {}
+    for activity in activities:
+        assert activity["activity_booking"], "Could not find activity booking."
+        rosters[activity["_id"]] = {
+            "players": activity["players"],
+            "no_of_players": activity["activity_booking"][0]["no_of_players"],
+        }
+    return rosters
+
+
 async def update_join_request_db(activity_joins_id: str, req: str):
     """Update a request to "ACCEPTED" or "REJECTED".
 
+    The request and the roster change in one transaction. Accepting adds the
+    player(s) only if they are not on the roster yet and the activity has a free
+    spot, rejecting a request that was accepted takes them off the roster again.
+
     Args:
         activity_joins_id: str
         req: str
     """
-    try:
-        activity_joins_doc = mongodb_client[DBInfo.database][
-            CollInfo.activity_joins
-        ].find_one_and_update(
-            {
-                "_id": ObjectId(activity_joins_id),
-            },
+
+    def update(session):
+        activity_joins_doc = repository.activity_joins.collection.find_one_and_update(
+            {"_id": ObjectId(activity_joins_id)},
             {"$set": {"join_request": req}},
+            session=session,
         )
+        if activity_joins_doc is None or activity_joins_doc["join_request"] == req:
+            return activity_joins_doc
 
+        participant = join_participant(activity_joins_doc)
+        activity_records_id = ObjectId(activity_joins_doc["activity_record_id"])
+        activity_records = repository.activity_records.collection
+        if req == "ACCEPTED":
+            roster = get_rosters([activity_records_id], session).get(
+                activity_records_id
+            )
+            assert roster is not None, "Could not find activity record."
+            if participant not in roster["players"]:
+                assert (
+                    len(roster["players"]) < roster["no_of_players"]
+                ), "No free slot left."
+                activity_records.update_one(
+                    {"_id": activity_records_id},
+                    {
+                        "$push": {"players": participant},
+                        "$inc": {"schedule_version": 1},
+                    },
+                    session=session,
+                )
+        elif activity_joins_doc["join_request"] == "ACCEPTED":
+            activity_records.update_one(
+                {"_id": activity_records_id, "players": participant},
+                {"$pull": {"players": participant}, "$inc": {"schedule_version": 1}},
+                session=session,
+            )
+        return activity_joins_doc
+
+    try:
+        activity_joins_doc = await repository.run_transaction(update)
         if activity_joins_doc is None:
             return []
-        # Update activity_records
-        mongodb_client[DBInfo.database][CollInfo.activity_records].update_one(
-            {
-                "_id": ObjectId(activity_joins_doc["activity_record_id"]),
-            },
-            {
-                "$push": {
-                    "players": activity_joins_doc["player_ids"]
-                    if activity_joins_doc["team"]
-                    else activity_joins_doc["player_ids"][0]
+        cache.invalidate_tournament(activity_joins_doc["activity_record_id"])
+        return activity_joins_doc["player_ids"]
+    except Exception as e:
+        utils.raise_exception(e=e)
+
+
+async def accept_join_requests_db(activity_joins_ids: List[str]):
+    """Accept many join requests at once, in the given order while spots are left.
+
+    All requests and rosters change in one transaction, with one update of the
+    requests and one update per activity.
+
+    Args:
+        activity_joins_ids: List[str]
+
+    Returns:
+        Dict: activity_joins_id to the accepted player ids, empty if the request was
+            not found, not pending or the activity was full
+    """
+
+    def accept(session):
+        order = {
+            ObjectId(activity_joins_id): idx
+            for idx, activity_joins_id in enumerate(activity_joins_ids)
+        }
+        activity_joins_docs = sorted(
+            # Requests that were already accepted or declined are left out
+            repository.activity_joins.collection.find(
+                {"_id": {"$in": list(order)}, "join_request": "PENDING"},
+                session=session,
+            ),
+            key=lambda activity_joins_doc: order[activity_joins_doc["_id"]],
+        )
+        rosters = get_rosters(
+            list(
+                {
+                    ObjectId(activity_joins_doc["activity_record_id"])
+                    for activity_joins_doc in activity_joins_docs
                 }
-            },
+            ),
+            session,
+        )
+
+        accepted = []
+        new_players = collections.defaultdict(list)
+        for activity_joins_doc in activity_joins_docs:
+            activity_records_id = ObjectId(activity_joins_doc["activity_record_id"])
+            roster = rosters.get(activity_records_id)
+            participant = join_participant(activity_joins_doc)
+            if roster is None:
+                continue
+            if participant not in roster["players"]:
+                if len(roster["players"]) >= roster["no_of_players"]:
+                    continue
+                roster["players"].append(participant)
+                new_players[activity_records_id].append(participant)
+            accepted.append(activity_joins_doc)
+
+        if accepted:
+            repository.activity_joins.collection.update_many(
+                {
+                    "_id": {
+                        "$in": [
+                            activity_joins_doc["_id"] for activity_joins_doc in accepted
+                        ]
+                    }
+                },
+                {"$set": {"join_request": "ACCEPTED"}},
+                session=session,
+            )
+        for activity_records_id, participants in new_players.items():
+            repository.activity_records.collection.update_one(
+                {"_id": activity_records_id},
+                {
+                    "$push": {"players": {"$each": participants}},
+                    "$inc": {"schedule_version": 1},
+                },
+                session=session,
+            )
+        return accepted, list(new_players)
+
+    try:
+        accepted, activity_records_ids = await repository.run_transaction(accept)
+        for activity_records_id in activity_records_ids:
+            cache.invalidate_tournament(str(activity_records_id))
+        players = {activity_joins_id: [] for activity_joins_id in activity_joins_ids}
+        for activity_joins_doc in accepted:
+            players[str(activity_joins_doc["_id"])] = activity_joins_doc["player_ids"]
+        return players
+    except Exception as e:
+        utils.raise_exception(e=e)
+
+
+async def count_requests_db(activity_record_id: str, activity: str):
+    """Count pending join requests.
+
+    Args:
+        activity_record_id: str
+        activity: str
+
+    Returns:
+        int
+    """
+    try:
+        return await repository.activity_joins.count_documents(
+            pending_requests_filter(activity_record_id, activity)
         )
-        return activity_joins_doc["player_ids"]
     except Exception as e:
         utils.raise_exception(e=e)
 
@@ -99,15 +309,13 @@ async def get_player_list_db(activity_record_id: str):
     """
     try:
         # Get players
-        players = mongodb_client[DBInfo.database][CollInfo.activity_records].find_one(
+        players = await repository.activity_records.find_one(
             {"_id": ObjectId(activity_record_id)},
             {"players"},
         )
         assert players is not None, "Could not find players for this activity."
-        player_infos = []
-        for player in players["players"]:
-            player_infos.append(await internal.get_player_info(player))
-        return player_infos
+        player_infos = await internal.get_player_infos(players["players"])
+        return [player_infos[player] for player in players["players"]]
     except Exception as e:
         utils.raise_exception(e=e)
 
@@ -115,31 +323,152 @@ async def get_player_list_db(activity_record_id: str):
 #################
 #   Lock Slot   #
 #################
+async def get_slot_capacity(activity_records_id: str):
+    """Get the number of participants an activity takes.
+
+    Args:
+        activity_records_id: str
+
+    Returns:
+        int: no_of_players of the activity booking
+    """
+
+    activity = await repository.activity_records.aggregate(
+        [
+            {"$match": {"_id": ObjectId(activity_records_id)}},
+            {"$project": {"activity_id": {"$toObjectId": "$activity_id"}}},
+            # localField together with a pipeline needs MongoDB 5.0
+            {
+                "$lookup": {
+                    "from": repository.tournaments.collection_name,
+                    "localField": "activity_id",
+                    "foreignField": "_id",
+                    "pipeline": [{"$project": {"no_of_players": 1}}],
+                    "as": "activity_booking",
+                }
+            },
+        ]
+    )
+    assert activity, "Could not find activity record."
+    assert activity[0]["activity_booking"], "Could not find activity booking."
+    return activity[0]["activity_booking"][0]["no_of_players"]
+
+
 async def lock_slot_db(activity_records_id: str, names: Optional[List[str]] = None):
     """Locks a spot for a player or a team.
 
+    The slot number is taken from a per record counter and the lock is pushed in
+    the same update, which only matches while the activity has a free spot, so
+    concurrent locks never share a number or overfill the activity.
+
     Args:
         activity_records_id: str
         names: Optional[List[str]]
+
+    Returns:
+        List[str]: The locked participant
     """
 
     if names is None:
         names = [""]
     try:
-        players = mongodb_client[DBInfo.database][CollInfo.activity_records].find_one(
-            {"_id": ObjectId(activity_records_id)}, {"players": 1}
+        capacity = await get_slot_capacity(activity_records_id)
+
+        # __lock_slot__NNN__ from the counter, records locked before the counter
+        # existed continue from their number of players
+        lock_slot = {
+            "$let": {
+                "vars": {"number": {"$toString": "$lock_slot_counter"}},
+                "in": {
+                    "$concat": [
+                        "__lock_slot__",
+                        {
+                            "$substrCP": [
+                                "000",
+                                0,
+                                {
+                                    "$max": [
+                                        0,
+                                        {"$subtract": [3, {"$strLenCP": "$$number"}]},
+                                    ]
+                                },
+                            ]
+                        },
+                        "$$number",
+                        "__",
+                    ]
+                },
+            }
+        }
+        if len(names) > 1:
+            participant = {
+                "$map": {
+                    "input": {"$literal": names},
+                    "as": "name",
+                    "in": {"$concat": [lock_slot, "$$name"]},
+                }
+            }
+        else:
+            participant = {"$concat": [lock_slot, {"$literal": names[0]}]}
+
+        activity_record = await repository.activity_records.find_one_and_update(
+            {
+                "_id": ObjectId(activity_records_id),
+                "$expr": {"$lt": [{"$size": "$players"}, capacity]},
+            },
+            [
+                {
+                    "$set": {
+                        "lock_slot_counter": {
+                            "$add": [
+                                {
+                                    "$ifNull": [
+                                        "$lock_slot_counter",
+                                        {"$size": "$players"},
+                                    ]
+                                },
+                                1,
+                            ]
+                        },
+                        "schedule_version": {
+                            "$add": [{"$ifNull": ["$schedule_version", 0]}, 1]
+                        },
+                    }
+                },
+                {"$set": {"players": {"$concatArrays": ["$players", [participant]]}}},
+            ],
+            {"players": {"$slice": -1}},
+            return_document=ReturnDocument.AFTER,
         )
-        assert players is not None, "Could not fins players."
+        assert activity_record is not None, "No free slot left."
+        cache.invalidate_tournament(activity_records_id)
+
+        participant = activity_record["players"][-1]
+        return [participant] if type(participant) != list else participant
+    except Exception as e:
+        utils.raise_exception(e=e)
 
-        curr_player = len(players["players"]) + 1
-        ls = f"__lock_slot__{str(curr_player).rjust(3, '0')}__"
 
-        participant = [ls + name for name in names] if len(names) > 1 else ls + names[0]
+########################
+#   Schedule Version   #
+########################
+async def update_court_ids_db(activity_records_id: str, court_ids: List[str]):
+    """Replace the courts of an activity and mark its schedule as outdated.
 
-        mongodb_client[DBInfo.database][CollInfo.activity_records].update_one(
-            {"_id": ObjectId(activity_records_id)}, {"$push": {"players": participant}}
+    Args:
+        activity_records_id: str
+        court_ids: List[str]
+    """
+    try:
+        activity_record = await repository.activity_records.find_one_and_update(
+            {"_id": ObjectId(activity_records_id)},
+            {"$set": {"court_ids": court_ids}, "$inc": {"schedule_version": 1}},
+            {"club_id": 1},
         )
-        return [participant] if type(participant) != list else participant
+        assert activity_record is not None, "Could not find activity record."
+        cache.invalidate_tournament(activity_records_id)
+        cache.invalidate_club(activity_record["club_id"])
+        return court_ids
     except Exception as e:
         utils.raise_exception(e=e)
 
@@ -154,6 +483,9 @@ async def get_all_available_courts_db(
 
     Args:
         club_id (str): Club ID
+        start_datetime (int): Start of the window
+        end_datetime (int): End of the window, a court booked until start_datetime
+            or from end_datetime is available
 
     Returns:
         List: A list of available Court documents of a club from the database.
@@ -161,28 +493,81 @@ async def get_all_available_courts_db(
     """
 
     try:
-        court_infos = list(
-            mongodb_client[DBInfo.database][CollInfo.courts].find({"club_id": club_id})
-        )
-        activity_record_infos = list(
-            mongodb_client[DBInfo.database][CollInfo.activity_records].find(
+        await repository.ensure_indexes()
+        court_infos = await repository.courts.find({"club_id": club_id})
+        # Every booking overlapping the window, also ones that started before it,
+        # served by the (club_id, end_datetime, start_datetime) index so bookings
+        # that ended before the window are not scanned
+        court_ids = set(
+            await repository.activity_records.distinct(
+                "court_ids",
                 {
                     "club_id": club_id,
-                    "start_datetime": {"$gte": start_datetime, "$lte": end_datetime},
+                    "start_datetime": {"$lt": end_datetime},
+                    "end_datetime": {"$gt": start_datetime},
                 },
-                {"court_ids": 1},
             )
         )
-        court_ids = []
-        if activity_record_infos:
-            for item in activity_record_infos:
-                court_ids.extend(item["court_ids"])
 
         return [court for court in court_infos if str(court["_id"]) not in court_ids]
     except Exception as e:
         utils.raise_exception(e=e)
 
 
+async def get_available_courts_for_slots_db(
+    club_id: str, slots: List[Tuple[int, int]]
+):
+    """Get the available courts of a club for many time slots at once.
+
+    The bookings of the club are loaded once for the range the slots span and
+    indexed per court, every slot is then answered from that index.
+
+    Args:
+        club_id (str): Club ID
+        slots (List[Tuple[int, int]]): (start_datetime, end_datetime) of every slot
+
+    Returns:
+        List: Per slot, a list of available Court documents of a club.
+            List[List[schemas.Court]]
+    """
+
+    try:
+        if not slots:
+            return []
+        availability = await court_availability.get_club_availability(
+            club_id,
+            min(start for start, _ in slots),
+            max(end for _, end in slots),
+        )
+        return [availability.available_courts(start, end) for start, end in slots]
+    except Exception as e:
+        utils.raise_exception(e=e)
+
+
+async def get_free_court_windows_db(
+    club_id: str, start_datetime: int, end_datetime: int, min_duration: int = 0
+):
+    """Get the free time windows of every court of a club.
+
+    Args:
+        club_id (str): Club ID
+        start_datetime (int): Start of the range
+        end_datetime (int): End of the range
+        min_duration (int): Shorter windows are left out
+
+    Returns:
+        Dict: Court id to a list of free (start_datetime, end_datetime) windows.
+    """
+
+    try:
+        availability = await court_availability.get_club_availability(
+            club_id, start_datetime, end_datetime
+        )
+        return availability.free_windows(start_datetime, end_datetime, min_duration)
+    except Exception as e:
+        utils.raise_exception(e=e)
+
+
 async def get_player_info(player_id: str):
     """
     Get player name and photo_url
@@ -199,7 +584,7 @@ async def get_player_info(player_id: str):
     """
     if player_id.startswith("__lock_slot__"):
         return {"player_id": "", "name": player_id[18:], "photo_url": ""}
-    out = mongodb_client[DBInfo.database][CollInfo.players].find_one(
+    out = await repository.players.find_one(
         {"_id": player_id},
         {"name", "photo_url"},
     )
@@ -207,6 +592,50 @@ async def get_player_info(player_id: str):
     return {"player_id": player_id, "name": out["name"], "photo_url": out["photo_url"]}
 
 
+async def get_player_infos(player_ids: List[str]):
+    """
+    Get player name and photo_url for several players with a single query
+
+    Args:
+        player_ids: List[str]
+
+    Returns:
+        {
+            "string": {
+                "player_id": "string",
+                "name": "string",
+                "photo_url": "string"
+            }
+        }
+    """
+    player_infos = {}
+    lookup_ids = []
+    for player_id in player_ids:
+        if player_id in player_infos:
+            continue
+        if player_id.startswith("__lock_slot__"):
+            player_infos[player_id] = {
+                "player_id": "",
+                "name": player_id[18:],
+                "photo_url": "",
+            }
+        else:
+            player_infos[player_id] = None
+            lookup_ids.append(player_id)
+    if lookup_ids:
+        for out in await repository.players.find(
+            {"_id": {"$in": lookup_ids}},
+            {"name", "photo_url"},
+        ):
+            player_infos[out["_id"]] = {
+                "player_id": out["_id"],
+                "name": out["name"],
+                "photo_url": out["photo_url"],
+            }
+    assert None not in player_infos.values(), "Could not find player info."
+    return player_infos
+
+
 async def get_court_info(court_id: str):
     """
     Get court name
@@ -220,7 +649,7 @@ async def get_court_info(court_id: str):
             "name": "string",
         }
     """
-    out = mongodb_client[DBInfo.database][CollInfo.courts].find_one(
+    out = await repository.courts.find_one(
         {"_id": ObjectId(court_id)},
         {"name"},
     )
@@ -229,3 +658,40 @@ async def get_court_info(court_id: str):
         "court_id": court_id,
         "name": out["name"],
     }
+
+
+async def get_court_infos(court_ids: List[str], club_id: Optional[str] = None):
+    """
+    Get court names for several courts with a single query, courts of a club are
+    cached until cache.invalidate_courts is called for the club
+
+    Args:
+        court_ids: List[str]
+        club_id: Optional[str], club the courts belong to, nothing is cached if None
+
+    Returns:
+        {
+            "court_id": {
+                "court_id": "string",
+                "name": "string",
+            }
+        }
+    """
+    court_infos = {} if club_id is None else cache.club_courts.get(club_id, {})
+    missing = {court_id for court_id in court_ids if court_id not in court_infos}
+    if missing:
+        courts = await repository.courts.find(
+            {"_id": {"$in": [ObjectId(court_id) for court_id in missing]}},
+            {"name"},
+        )
+        assert len(courts) == len(missing), "Could not find court info."
+        # Cached maps are shared, so add to a copy
+        court_infos = dict(court_infos)
+        for court in courts:
+            court_infos[str(court["_id"])] = {
+                "court_id": str(court["_id"]),
+                "name": court["name"],
+            }
+        if club_id is not None:
+            cache.club_courts.set(club_id, court_infos)
+    return {court_id: court_infos[court_id] for court_id in court_ids}
@@ -0,0 +1,161 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """
+    Bounded in-process cache with least-recently-used eviction and a time to live.
+
+    Entries live in the worker process only, so writers in the same process
+    invalidate them explicitly and the TTL bounds how stale a view written by
+    another worker can get.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 5.0,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None):
+        """
+        Get a value and mark it as recently used.
+        Args:
+            key: Hashable
+            default: returned on a miss
+        Returns:
+            cached value or default
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= self.timer():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Store a value, evicting the least recently used entries over maxsize.
+        Args:
+            key: Hashable
+            value: Any
+        """
+
+        self._entries[key] = (self.timer() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """
+        Drop a value if it is cached.
+        Args:
+            key: Hashable
+        """
+
+        self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        """
+        Drop every value whose key matches the predicate.
+        Args:
+            predicate: Callable[[Hashable], bool]
+        """
+
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        """
+        Get the cache counters.
+        Returns:
+            {"size", "maxsize", "hits", "misses", "evictions", "expirations"}
+        """
+
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Fully resolved tournament views, activity histories are keyed by
+# (activity_record_id, round_start, round_end) and brackets by
+# (activity_record_id, top_k)
+activity_histories = TTLCache()
+tournament_brackets = TTLCache()
+# Court availability indexes, keyed by (club_id, range_start, range_end)
+club_availabilities = TTLCache(maxsize=64)
+# Court infos of a club by court id, keyed by club_id
+club_courts = TTLCache(maxsize=1024, ttl=300.0)
+
+
+def invalidate_tournament(activity_record_id: str):
+    """
+    Drop every cached view of a tournament after a write.
+    Args:
+        activity_record_id: str
+    """
+
+    activity_histories.invalidate_where(lambda key: key[0] == activity_record_id)
+    tournament_brackets.invalidate_where(lambda key: key[0] == activity_record_id)
+
+
+def invalidate_club(club_id: str):
+    """
+    Drop the court availability indexes of a club after a booking of the club was
+    created, changed or cancelled.
+    Args:
+        club_id: str
+    """
+
+    club_availabilities.invalidate_where(lambda key: key[0] == club_id)
+
+
+def invalidate_courts(club_id: str):
+    """
+    Drop the cached court infos of a club after a court was renamed, added or
+    removed.
+    Args:
+        club_id: str
+    """
+
+    club_courts.invalidate(club_id)
+
+
+def tournament_cache_stats():
+    """
+    Get the counters of the tournament view caches.
+    Returns:
+        {"activity_histories": stats, "tournament_brackets": stats}
+    """
+
+    return {
+        "activity_histories": activity_histories.stats(),
+        "tournament_brackets": tournament_brackets.stats(),
+    }
@@ -0,0 +1,188 @@
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+import cache
+import repository
+
+
+class CourtTimeline:
+    """
+    Booked time of one court as sorted, non overlapping intervals. Overlapping and
+    touching bookings are merged, so both starts and ends are sorted and a slot is
+    checked with one bisect.
+    """
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, intervals: List[Tuple[int, int]]):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        for start, end in sorted(intervals):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def is_free(self, start: int, end: int):
+        """
+        Check that no booking overlaps [start, end).
+        Args:
+            start: int
+            end: int
+        Returns:
+            bool
+        """
+
+        # First booking still running after start
+        idx = bisect.bisect_right(self.ends, start)
+        return idx == len(self.starts) or self.starts[idx] >= end
+
+    def free_windows(self, start: int, end: int, min_duration: int = 0):
+        """
+        Get the gaps between bookings inside [start, end).
+        Args:
+            start: int
+            end: int
+            min_duration: int, shorter gaps are left out
+        Returns:
+            List of (start, end)
+        """
+
+        windows = []
+        idx = bisect.bisect_right(self.ends, start)
+        cursor = start
+        while idx < len(self.starts) and self.starts[idx] < end:
+            if self.starts[idx] - cursor >= max(min_duration, 1):
+                windows.append((cursor, self.starts[idx]))
+            cursor = max(cursor, self.ends[idx])
+            idx += 1
+        if end - cursor >= max(min_duration, 1):
+            windows.append((cursor, end))
+        return windows
+
+
+class ClubAvailability:
+    """
+    Timelines of every court of a club for the bookings overlapping a date range.
+    """
+
+    __slots__ = ("club_id", "range_start", "range_end", "courts", "timelines")
+
+    def __init__(
+        self,
+        club_id: str,
+        range_start: int,
+        range_end: int,
+        courts: List[Dict],
+        timelines: Dict[str, CourtTimeline],
+    ):
+        self.club_id = club_id
+        self.range_start = range_start
+        self.range_end = range_end
+        self.courts = courts
+        self.timelines = timelines
+
+    def check_range(self, start: int, end: int):
+        assert (
+            self.range_start <= start < end <= self.range_end
+        ), f"{start} - {end} is outside of the indexed range."
+
+    def available_courts(self, start: int, end: int):
+        """
+        Get the courts with no booking overlapping [start, end).
+        Args:
+            start: int
+            end: int
+        Returns:
+            List[schemas.Court]
+        """
+
+        self.check_range(start, end)
+        return [
+            court
+            for court in self.courts
+            if self.timelines[str(court["_id"])].is_free(start, end)
+        ]
+
+    def free_windows(self, start: int, end: int, min_duration: int = 0):
+        """
+        Get the free windows of every court inside [start, end).
+        Args:
+            start: int
+            end: int
+            min_duration: int
+        Returns:
+            {court_id: List of (start, end)}
+        """
+
+        self.check_range(start, end)
+        return {
+            court_id: timeline.free_windows(start, end, min_duration)
+            for court_id, timeline in self.timelines.items()
+        }
+
+
+async def build_club_availability(club_id: str, range_start: int, range_end: int):
+    """
+    Load the courts of a club and every booking overlapping the range with two
+    queries and index them per court.
+    Args:
+        club_id: str
+        range_start: int
+        range_end: int
+    Returns:
+        ClubAvailability
+    """
+
+    await repository.ensure_indexes()
+    courts = await repository.courts.find({"club_id": club_id})
+    # Served by the (club_id, end_datetime, start_datetime) index
+    bookings = await repository.activity_records.find(
+        {
+            "club_id": club_id,
+            "start_datetime": {"$lt": range_end},
+            "end_datetime": {"$gt": range_start},
+        },
+        {"_id": 0, "court_ids": 1, "start_datetime": 1, "end_datetime": 1},
+    )
+    intervals: Dict[str, List[Tuple[int, int]]] = {
+        str(court["_id"]): [] for court in courts
+    }
+    for booking in bookings:
+        for court_id in booking["court_ids"]:
+            if court_id in intervals:
+                intervals[court_id].append(
+                    (booking["start_datetime"], booking["end_datetime"])
+                )
+    return ClubAvailability(
+        club_id,
+        range_start,
+        range_end,
+        courts,
+        {court_id: CourtTimeline(booked) for court_id, booked in intervals.items()},
+    )
+
+
+async def get_club_availability(
+    club_id: str, range_start: int, range_end: int
+) -> ClubAvailability:
+    """
+    Get the availability index of a club for a range, cached until a booking of
+    the club changes.
+    Args:
+        club_id: str
+        range_start: int
+        range_end: int
+    Returns:
+        ClubAvailability
+    """
+
+    cache_key = (club_id, range_start, range_end)
+    availability: Optional[ClubAvailability] = cache.club_availabilities.get(
+        cache_key
+    )
+    if availability is None:
+        availability = await build_club_availability(club_id, range_start, range_end)
+        cache.club_availabilities.set(cache_key, availability)
+    return availability
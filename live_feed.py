@@ -0,0 +1,140 @@
+"""
+In-process live feed of tournament changes.
+
+The write functions publish a compact delta after every stored change, and
+spectator screens subscribe to a tournament instead of polling the full view.
+Every subscriber has its own bounded queue, so a slow subscriber never holds up
+a write or the other subscribers. A subscriber that falls behind has its queued
+deltas replaced by one "resync" event, after which it reads the full view
+again. Events of a tournament are numbered by seq, and one event dict is shared
+by every subscriber.
+
+Event types, with player and court ids as stored:
+    score: round_idx, match_idx, team_1_score, team_2_score, winner
+    leaderboard: entries, the leaderboard entries that changed
+    round: round_idx, matches, a new mexicano round
+    court: round_idx, match_idx, court_id
+    arrival: player_id, arrived
+"""
+import asyncio
+from typing import Dict, Optional, Set
+
+RESYNC = "resync"
+
+
+class Subscription:
+    """
+    Deltas of one tournament for one subscriber, read with get or async for.
+    """
+
+    __slots__ = ("feed", "activity_record_id", "queue", "dropped")
+
+    def __init__(self, feed: "LiveFeed", activity_record_id: str, maxsize: int):
+        self.feed = feed
+        self.activity_record_id = activity_record_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, event):
+        if self.queue.full():
+            # The subscriber can no longer follow the deltas, it has to read the
+            # full view again
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {
+                "type": RESYNC,
+                "activity_record_id": self.activity_record_id,
+                "seq": event["seq"],
+            }
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.feed.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+
+class LiveFeed:
+    """
+    Fan-out of published events to the subscribers of a tournament.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._seqs: Dict[str, int] = {}
+        self.published = 0
+
+    def subscribe(self, activity_record_id: str, maxsize: Optional[int] = None):
+        """
+        Follow the changes of a tournament from now on, close the subscription
+        when done or use it as a context manager.
+        Args:
+            activity_record_id: str
+            maxsize: int, events held for the subscriber, the feed default if None
+        Returns:
+            Subscription
+        """
+
+        subscription = Subscription(self, activity_record_id, maxsize or self.maxsize)
+        self._subscriptions.setdefault(activity_record_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.activity_record_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.activity_record_id]
+            self._seqs.pop(subscription.activity_record_id, None)
+
+    def publish(self, activity_record_id: str, event_type: str, **fields):
+        """
+        Send an event to every subscriber of a tournament without waiting.
+        Args:
+            activity_record_id: str
+            event_type: str
+            fields: fields of the event
+        Returns:
+            int, number of subscribers the event was sent to
+        """
+
+        subscriptions = self._subscriptions.get(activity_record_id)
+        if not subscriptions:
+            return 0
+        seq = self._seqs.get(activity_record_id, 0) + 1
+        self._seqs[activity_record_id] = seq
+        event = {
+            "type": event_type,
+            "activity_record_id": activity_record_id,
+            "seq": seq,
+            **fields,
+        }
+        for subscription in subscriptions:
+            subscription.put(event)
+        self.published += 1
+        return len(subscriptions)
+
+    def subscriber_count(self, activity_record_id: Optional[str] = None):
+        if activity_record_id is not None:
+            return len(self._subscriptions.get(activity_record_id, ()))
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+# Feed of the tournaments written by this process
+feed = LiveFeed()
@@ -0,0 +1,253 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Pairings of a group of four players sorted by score, the first one is the
+# classic 1 + 4 against 2 + 3 and wins ties
+SINGLE_PAIRINGS = np.array(
+    [
+        [[0, 3], [1, 2]],
+        [[0, 2], [1, 3]],
+        [[0, 1], [2, 3]],
+    ]
+)
+# A group of two teams can only be paired one way
+TEAM_PAIRINGS = np.array([[[0], [1]]])
+
+
+class PairingWeights:
+    """
+    Weights of the pairing cost. Spread is the point difference between the two
+    sides of a match, partner and opponent are the number of earlier rounds in which
+    two participants already played together or against each other, displacement is
+    the number of standings places a group spans beyond adjacent ones and sit out is
+    the number of rounds a participant already sat out.
+    """
+
+    __slots__ = ("spread", "partner", "opponent", "displacement", "sit_out")
+
+    def __init__(
+        self,
+        spread: float = 1.0,
+        partner: float = 16.0,
+        opponent: float = 4.0,
+        displacement: float = 4.0,
+        sit_out: float = 64.0,
+    ):
+        self.spread = spread
+        self.partner = partner
+        self.opponent = opponent
+        self.displacement = displacement
+        self.sit_out = sit_out
+
+
+def pairing_history(
+    rounds: Sequence[Sequence[Tuple[Sequence[int], Sequence[int]]]],
+    no_participants: int,
+):
+    """
+    Count how often every two participants played together and against each other.
+    Args:
+        rounds: per round, matches as (side_1, side_2) of participant indices
+        no_participants: int
+    Returns:
+        partner_counts: np.ndarray (no_participants, no_participants)
+        opponent_counts: np.ndarray (no_participants, no_participants)
+        sit_out_counts: np.ndarray (no_participants,)
+    """
+
+    partner_counts = np.zeros((no_participants, no_participants), dtype=np.int32)
+    opponent_counts = np.zeros((no_participants, no_participants), dtype=np.int32)
+    played = np.zeros(no_participants, dtype=np.int32)
+    for _round in rounds:
+        for side_1, side_2 in _round:
+            side_1 = np.asarray(side_1)
+            side_2 = np.asarray(side_2)
+            for side in (side_1, side_2):
+                if len(side) == 2:
+                    partner_counts[side[0], side[1]] += 1
+                    partner_counts[side[1], side[0]] += 1
+                played[side] += 1
+            opponent_counts[np.ix_(side_1, side_2)] += 1
+            opponent_counts[np.ix_(side_2, side_1)] += 1
+    sit_out_counts = len(rounds) - played
+    return partner_counts, opponent_counts, sit_out_counts
+
+
+def group_costs(
+    groups: np.ndarray,
+    scores: np.ndarray,
+    partner_counts: np.ndarray,
+    opponent_counts: np.ndarray,
+    pairings: np.ndarray,
+    weights: PairingWeights,
+):
+    """
+    Cost of every pairing of every group, computed for all groups at once.
+    Args:
+        groups: np.ndarray (no_groups, group_size) of standings positions, ascending
+        scores: np.ndarray (no_participants,)
+        partner_counts: np.ndarray (no_participants, no_participants)
+        opponent_counts: np.ndarray (no_participants, no_participants)
+        pairings: SINGLE_PAIRINGS or TEAM_PAIRINGS
+        weights: PairingWeights
+    Returns:
+        costs: np.ndarray (no_groups, no_pairings), the full cost
+        repeats: np.ndarray (no_groups, no_pairings), the repeat pairing part of it
+    """
+
+    # (no_groups, no_pairings, 2 sides, side size) standings positions
+    sides = groups[:, pairings]
+    side_scores = scores[sides].sum(axis=3)
+    repeats = weights.opponent * opponent_counts[
+        sides[:, :, 0, :, None], sides[:, :, 1, None, :]
+    ].sum(axis=(2, 3))
+    if sides.shape[3] == 2:
+        repeats += weights.partner * (
+            partner_counts[sides[:, :, 0, 0], sides[:, :, 0, 1]]
+            + partner_counts[sides[:, :, 1, 0], sides[:, :, 1, 1]]
+        )
+    displacement = groups[:, -1] - groups[:, 0] - (groups.shape[1] - 1)
+    costs = (
+        weights.spread * np.abs(side_scores[:, :, 0] - side_scores[:, :, 1])
+        + repeats
+        + weights.displacement * displacement[:, None]
+    )
+    return costs, repeats
+
+
+def best_pairings(groups: np.ndarray, *args):
+    """
+    Cheapest pairing of every group.
+    Args:
+        groups: np.ndarray (no_groups, group_size)
+        args: the remaining arguments of group_costs
+    Returns:
+        choices: np.ndarray (no_groups,) index into the pairings
+        costs: np.ndarray (no_groups,)
+        repeats: np.ndarray (no_groups,)
+    """
+
+    costs, repeats = group_costs(groups, *args)
+    choices = costs.argmin(axis=1)
+    rows = np.arange(len(groups))
+    return choices, costs[rows, choices], repeats[rows, choices]
+
+
+def pair_round(
+    scores: Sequence[float],
+    partner_counts: Optional[np.ndarray] = None,
+    opponent_counts: Optional[np.ndarray] = None,
+    sit_out_counts: Optional[np.ndarray] = None,
+    team: bool = False,
+    weights: Optional[PairingWeights] = None,
+    max_passes: int = 4,
+):
+    """
+    Pair the next mexicano round. Participants are split into windows of adjacent
+    standings by dynamic programming, each window taking its cheapest pairing, and
+    participants left over when the roster is not a multiple of the group size sit
+    out. A bounded local search then swaps participants across neighbouring windows
+    while that lowers the total cost.
+    Args:
+        scores: points of every participant, sorted from the highest
+        partner_counts: np.ndarray (n, n), zeros if None
+        opponent_counts: np.ndarray (n, n), zeros if None
+        sit_out_counts: np.ndarray (n,), zeros if None
+        team: bool, True pairs teams one against one instead of four players
+        weights: PairingWeights
+        max_passes: int, number of local search passes over the windows
+    Returns:
+        matches: List of (side_1, side_2) tuples of participant indices
+        sitting_out: List of participant indices
+    """
+
+    scores = np.asarray(scores, dtype=np.float64)
+    no_participants = len(scores)
+    if partner_counts is None:
+        partner_counts = np.zeros((no_participants, no_participants), dtype=np.int32)
+    if opponent_counts is None:
+        opponent_counts = np.zeros((no_participants, no_participants), dtype=np.int32)
+    if sit_out_counts is None:
+        sit_out_counts = np.zeros(no_participants, dtype=np.int32)
+    if weights is None:
+        weights = PairingWeights()
+    pairings = TEAM_PAIRINGS if team else SINGLE_PAIRINGS
+    group_size = 2 if team else 4
+    no_sit_outs = no_participants % group_size
+    if no_participants < group_size:
+        return [], list(range(no_participants))
+
+    cost_args = (scores, partner_counts, opponent_counts, pairings, weights)
+
+    # Best pairing of every window of adjacent participants
+    windows = np.arange(no_participants - group_size + 1)[:, None] + np.arange(
+        group_size
+    )
+    window_best = best_pairings(windows, *cost_args)[1]
+    sit_out_costs = weights.sit_out * np.asarray(sit_out_counts, dtype=np.float64)
+
+    # best[i][k]: cheapest way to place participants i.. with k sit outs left
+    best = np.full((no_participants + 1, no_sit_outs + 1), np.inf)
+    choice = np.zeros((no_participants + 1, no_sit_outs + 1), dtype=np.int8)
+    best[no_participants, 0] = 0.0
+    for i in range(no_participants - 1, -1, -1):
+        for k in range(no_sit_outs + 1):
+            if i + group_size <= no_participants:
+                best[i, k] = best[i + group_size, k] + window_best[i]
+                choice[i, k] = 2
+            if k and best[i + 1, k - 1] + sit_out_costs[i] < best[i, k]:
+                best[i, k] = best[i + 1, k - 1] + sit_out_costs[i]
+                choice[i, k] = 1
+
+    groups = []
+    sitting_out = []
+    i, k = 0, no_sit_outs
+    while i < no_participants:
+        if choice[i, k] == 1:
+            sitting_out.append(i)
+            i, k = i + 1, k - 1
+        else:
+            groups.append(list(range(i, i + group_size)))
+            i += group_size
+    groups = np.array(groups, dtype=np.int64).reshape(-1, group_size)
+
+    # Windows are only broken up to avoid repeat pairings, so a swap across two
+    # neighbouring windows has to lower both the repeats and the full cost
+    swaps = np.array([(a, b) for a in range(group_size) for b in range(group_size)])
+    rows = np.arange(len(swaps))
+    choices, costs, repeats = best_pairings(groups, *cost_args)
+    for _ in range(max_passes):
+        improved = False
+        for g in range(len(groups) - 1):
+            candidates = np.repeat(groups[None, g : g + 2], len(swaps), axis=0)
+            candidates[rows, 0, swaps[:, 0]] = groups[g + 1, swaps[:, 1]]
+            candidates[rows, 1, swaps[:, 1]] = groups[g, swaps[:, 0]]
+            candidates.sort(axis=2)
+            _, candidate_costs, candidate_repeats = best_pairings(
+                candidates.reshape(-1, group_size), *cost_args
+            )
+            candidate_costs = candidate_costs.reshape(-1, 2).sum(axis=1)
+            candidate_repeats = candidate_repeats.reshape(-1, 2).sum(axis=1)
+            candidate_costs[candidate_repeats >= repeats[g] + repeats[g + 1]] = np.inf
+            best_swap = int(candidate_costs.argmin())
+            if candidate_costs[best_swap] < costs[g] + costs[g + 1]:
+                groups[g : g + 2] = candidates[best_swap]
+                (
+                    choices[g : g + 2],
+                    costs[g : g + 2],
+                    repeats[g : g + 2],
+                ) = best_pairings(groups[g : g + 2], *cost_args)
+                improved = True
+        if not improved:
+            break
+
+    matches: List[Tuple[Tuple[int, ...], Tuple[int, ...]]] = []
+    for group, pairing in zip(groups, pairings[choices]):
+        matches.append(
+            (
+                tuple(int(p) for p in group[pairing[0]]),
+                tuple(int(p) for p in group[pairing[1]]),
+            )
+        )
+    return matches, sitting_out
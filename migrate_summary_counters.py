@@ -0,0 +1,106 @@
+"""
+Convert tournament summaries from per match result lists to counters.
+
+Every tournament_matchmakings document gets matches_played, matches_won,
+matches_drawn, matches_lost and the packed per match results recomputed from its
+stored rounds, and its standings and leaderboard rebuilt from them. The old
+matches lists counted wins as losses, so they are not carried over. Points are
+kept as stored. Running it again recomputes the same values.
+
+Records a score was written to while they were migrated are read and migrated
+again. Records still left unmigrated are upgraded by their next score, and read
+with their matches lists until then. Records that cannot be migrated, such as
+those of a deleted activity record, are reported and skipped.
+
+    python migrate_summary_counters.py
+"""
+import argparse
+import asyncio
+
+import repository
+import tournament_backend_final as backend
+
+# Times the records changed while migrating are migrated again
+MIGRATION_PASSES = 5
+# Records read at a time, paged by _id
+MIGRATION_BATCH_SIZE = 100
+
+
+async def migrate_records(query, dry_run: bool):
+    """
+    Migrate the records matching query, MIGRATION_BATCH_SIZE at a time.
+    Args:
+        query: filter on tournament_matchmakings
+        dry_run: bool, count documents without writing
+    Returns:
+        migrated: int
+        changed: List of _ids of the records changed while migrating
+        failed: int
+    """
+
+    migrated = 0
+    changed = []
+    failed = 0
+    batch_query = query
+    while True:
+        batch = await repository.tournament_matchmakings.find(
+            batch_query,
+            {"activity_record_id": 1, "record": 1},
+            sort=[("_id", 1)],
+            limit=MIGRATION_BATCH_SIZE,
+        )
+        for tournament in batch:
+            try:
+                update = await backend.rebuild_summary(
+                    tournament["activity_record_id"], tournament["record"]
+                )
+            except Exception as e:
+                print(f"skipped {tournament['_id']}: {e!r}")
+                failed += 1
+                continue
+            if dry_run:
+                migrated += 1
+                continue
+            # Skip records a score was written to since they were read
+            result = await repository.tournament_matchmakings.update_one(
+                {
+                    "_id": tournament["_id"],
+                    "record.summary_version": tournament["record"].get(
+                        "summary_version", {"$exists": False}
+                    ),
+                },
+                update,
+            )
+            if result.matched_count:
+                migrated += 1
+            else:
+                changed.append(tournament["_id"])
+        if len(batch) < MIGRATION_BATCH_SIZE:
+            return migrated, changed, failed
+        batch_query = {"$and": [query, {"_id": {"$gt": batch[-1]["_id"]}}]}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--dry-run", action="store_true", help="count documents without writing"
+    )
+    args = parser.parse_args()
+
+    migrated, changed, failed = await migrate_records({}, args.dry_run)
+    for _ in range(MIGRATION_PASSES):
+        if not changed:
+            break
+        retried, changed, retry_failed = await migrate_records(
+            {"_id": {"$in": changed}}, args.dry_run
+        )
+        migrated += retried
+        failed += retry_failed
+    print(
+        f"migrated {migrated} records, skipped {len(changed)} changed while "
+        f"migrating and {failed} that failed"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from pymongo import ASCENDING
+
+from database import mongodb_client
+from utils import CollInfo, DBInfo
+
+_executor: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(
+    thread_name_prefix="mongodb"
+)
+# Set once ensure_indexes ran in this process
+_indexes_ensured = False
+
+
+def configure(max_workers: Optional[int] = None, blocking: bool = False):
+    """
+    Configure how collection calls are executed.
+    Args:
+        max_workers: Size of the thread pool, defaults to the executor default
+        blocking: bool, True runs every call directly on the event loop thread
+    """
+
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+    _executor = (
+        None
+        if blocking
+        else ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mongodb")
+    )
+
+
+async def _run(func, *args, **kwargs):
+    call = functools.partial(func, *args, **kwargs)
+    if _executor is None:
+        return call()
+    return await asyncio.get_running_loop().run_in_executor(_executor, call)
+
+
+async def run_transaction(callback):
+    """
+    Run callback(session) in a transaction. The whole callback runs in one worker
+    thread with the synchronous collections, and is run again when the
+    transaction hits a transient error such as a write conflict.
+    Args:
+        callback: Callable[[ClientSession], Any]
+    Returns:
+        return value of callback
+    """
+
+    def run():
+        with mongodb_client.start_session() as session:
+            return session.with_transaction(callback)
+
+    return await _run(run)
+
+
+class AsyncCollection:
+    """
+    Awaitable wrapper around a pymongo collection.
+
+    Every call is run in the shared thread pool so a slow query only holds a
+    worker thread and never the event loop. Cursors are materialized inside the
+    worker thread and returned as lists.
+    """
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+
+    @property
+    def collection(self):
+        return mongodb_client[DBInfo.database][self.collection_name]
+
+    async def _run(self, func, *args, **kwargs):
+        return await _run(func, *args, **kwargs)
+
+    async def find_one(self, *args, **kwargs):
+        return await self._run(self.collection.find_one, *args, **kwargs)
+
+    async def find(self, *args, **kwargs):
+        return await self._run(lambda: list(self.collection.find(*args, **kwargs)))
+
+    async def aggregate(self, *args, **kwargs):
+        return await self._run(
+            lambda: list(self.collection.aggregate(*args, **kwargs))
+        )
+
+    async def distinct(self, *args, **kwargs):
+        return await self._run(self.collection.distinct, *args, **kwargs)
+
+    async def count_documents(self, *args, **kwargs):
+        return await self._run(self.collection.count_documents, *args, **kwargs)
+
+    async def insert_one(self, *args, **kwargs):
+        return await self._run(self.collection.insert_one, *args, **kwargs)
+
+    async def insert_many(self, *args, **kwargs):
+        return await self._run(self.collection.insert_many, *args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        return await self._run(self.collection.update_one, *args, **kwargs)
+
+    async def update_many(self, *args, **kwargs):
+        return await self._run(self.collection.update_many, *args, **kwargs)
+
+    async def find_one_and_update(self, *args, **kwargs):
+        return await self._run(self.collection.find_one_and_update, *args, **kwargs)
+
+    async def delete_one(self, *args, **kwargs):
+        return await self._run(self.collection.delete_one, *args, **kwargs)
+
+    async def delete_many(self, *args, **kwargs):
+        return await self._run(self.collection.delete_many, *args, **kwargs)
+
+    async def bulk_write(self, *args, **kwargs):
+        return await self._run(self.collection.bulk_write, *args, **kwargs)
+
+    async def create_index(self, *args, **kwargs):
+        return await self._run(self.collection.create_index, *args, **kwargs)
+
+
+activity_records = AsyncCollection(CollInfo.activity_records)
+activity_joins = AsyncCollection(CollInfo.activity_joins)
+# One document per schedule, with its rounds and summary embedded. A score only
+# sets its match and increments the summary entries of its players, so courts
+# scoring at once do not conflict and a score is a single atomic write without
+# a transaction.
+tournament_matchmakings = AsyncCollection(CollInfo.tournament_matchmakings)
+tournaments = AsyncCollection(CollInfo.tournaments)
+players = AsyncCollection(CollInfo.players)
+courts = AsyncCollection(CollInfo.courts)
+
+
+async def ensure_indexes():
+    """
+    Create the indexes the queries rely on, existing indexes are left as they are.
+    The queries call it before they run, so it only creates them once per process.
+    """
+
+    global _indexes_ensured
+    if _indexes_ensured:
+        return
+
+    # Court availability, bookings of a club that end after the start of a
+    # window, so the bookings that are over are not scanned
+    await activity_records.create_index(
+        [
+            ("club_id", ASCENDING),
+            ("end_datetime", ASCENDING),
+            ("start_datetime", ASCENDING),
+        ]
+    )
+    # Pending join requests, paged by _id
+    await activity_joins.create_index(
+        [
+            ("activity_record_id", ASCENDING),
+            ("activity", ASCENDING),
+            ("payment_method", ASCENDING),
+            ("join_request", ASCENDING),
+            ("_id", ASCENDING),
+        ]
+    )
+
+    _indexes_ensured = True
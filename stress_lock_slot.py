@@ -0,0 +1,113 @@
+"""
+Stress lock_slot_db with many simultaneous lockers.
+
+Seeds an activity with a few players in the configured database and fires more
+concurrent lock_slot_db calls than it has free spots, through the repository
+thread pool so the updates really race. Checks that exactly the free spots were
+locked, that the slot numbers continue from the players already there without
+gaps or duplicates, that every returned lock has the __lock_slot__NNN__name
+shape and is the one stored, and that the activity was never overfilled. Needs
+MongoDB 5.0 or later, get_slot_capacity looks the booking up with localField
+and a pipeline, and lock_slot_db updates with an aggregation pipeline.
+
+    python stress_lock_slot.py --capacity 64 --players 8 --lockers 200
+"""
+import argparse
+import asyncio
+
+from bson.objectid import ObjectId
+
+import booking
+import repository
+from database import mongodb_client
+
+
+async def seed_activity(capacity: int, no_players: int):
+    activity_id = ObjectId()
+    activity_record_id = ObjectId()
+    await repository.tournaments.insert_one(
+        {"_id": activity_id, "tournament_type": "Americano", "no_of_players": capacity}
+    )
+    await repository.activity_records.insert_one(
+        {
+            "_id": activity_record_id,
+            "club_id": "stress",
+            "activity_id": str(activity_id),
+            "activity_type": "tournament",
+            "players": [f"stress_{i}" for i in range(no_players)],
+            "court_ids": [],
+        }
+    )
+    return str(activity_record_id), activity_id
+
+
+async def lock(activity_record_id: str, idx: int, team: bool):
+    names = [f"a{idx}", f"b{idx}"] if team else [f"locker {idx}"]
+    try:
+        participant = await booking.lock_slot_db(activity_record_id, names)
+    except Exception as e:
+        # Only a full activity is an expected rejection
+        if "No free slot left." not in str(getattr(e, "detail", e)):
+            raise
+        return None
+    # __lock_slot__NNN__name for every name, with the same number
+    number = participant[0][13:16]
+    assert participant == [
+        f"__lock_slot__{number}__{name}" for name in names
+    ], f"unexpected lock {participant} for {names}"
+    return participant
+
+
+async def run(capacity: int, no_players: int, no_lockers: int, team: bool):
+    activity_record_id, activity_id = await seed_activity(capacity, no_players)
+    try:
+        locked = await asyncio.gather(
+            *(lock(activity_record_id, idx, team) for idx in range(no_lockers))
+        )
+        locked = [participant for participant in locked if participant is not None]
+        activity_record = await repository.activity_records.find_one(
+            {"_id": ObjectId(activity_record_id)}
+        )
+        slots = sorted(int(participant[0][13:16]) for participant in locked)
+
+        expected = min(no_lockers, capacity - no_players)
+        assert len(locked) == expected, f"locked {len(locked)}, expected {expected}"
+        # Numbers continue from the players already there, without gaps
+        assert slots == list(
+            range(no_players + 1, no_players + expected + 1)
+        ), f"slot numbers {slots}"
+        assert len(activity_record["players"]) == no_players + expected, "overfilled"
+        assert activity_record["players"][no_players:] == [
+            participant if team else participant[0]
+            for participant in sorted(locked, key=lambda participant: participant[0])
+        ], "stored locks differ from the returned ones"
+        assert activity_record["lock_slot_counter"] == no_players + expected
+        print(
+            f"{'team' if team else 'single':>6} | capacity {capacity:>3} | "
+            f"lockers {no_lockers:>4} | locked {len(locked):>3} | ok"
+        )
+    finally:
+        await repository.activity_records.delete_one(
+            {"_id": ObjectId(activity_record_id)}
+        )
+        await repository.tournaments.delete_one({"_id": activity_id})
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--capacity", type=int, default=64)
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--lockers", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    repository.configure(max_workers=args.workers)
+    version = mongodb_client.server_info()["versionArray"]
+    assert version >= [5, 0], f"MongoDB 5.0 or later is needed, not {version}"
+    for team in (False, True):
+        await run(args.capacity, args.players, args.lockers, team)
+    repository.configure()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,15 +1,125 @@
+import collections
 import itertools
 import math
 import operator
-from typing import Any, List, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from bson.objectid import ObjectId
+from pymongo import ReturnDocument, UpdateOne
 
+import cache
 import internal
+import live_feed
+import mexicano_pairing
+import repository
 import schemas
 import utils
-from database import mongodb_client
-from utils import CollInfo, DBInfo
+
+# Americano rounds stored when a schedule is created, later rounds are created the
+# first time they are read or scored
+INITIAL_ROUNDS = 1
+# Aggregation expression of rankings_current
+RANKINGS_CURRENT = {
+    "$and": [
+        {"$isArray": "$record.leaderboard"},
+        {
+            "$eq": [
+                {"$ifNull": ["$record.standings_version", 0]},
+                {"$ifNull": ["$record.summary_version", 0]},
+            ]
+        },
+    ]
+}
+# Summary results are packed per match, two bits each in 64 bit integers
+MATCH_NOT_PLAYED, MATCH_WON, MATCH_DRAWN, MATCH_LOST = range(4)
+MATCH_COUNTERS = {
+    MATCH_WON: "matches_won",
+    MATCH_DRAWN: "matches_drawn",
+    MATCH_LOST: "matches_lost",
+}
+RESULT_BITS = 2
+RESULT_MASK = (1 << RESULT_BITS) - 1
+RESULTS_PER_WORD = 31
+
+
+async def rotation_groups(players, round_idx, step):
+    """
+    Get both groups of a round of the americano rotation without simulating the
+    earlier rounds. group_a[0] stays in place while group_a[1:] followed by group_b
+    reversed forms a ring that moves `step` positions to the right every round.
+    Args:
+        players: List of player ids with an even number of entries
+        round_idx: int
+        step: int, 2 for americano and 1 for team americano
+    Returns:
+        group_a: List of player ids
+        group_b: List of player ids
+    """
+
+    half = len(players) // 2
+    if step > half - 1:
+        # The rotation also moves group_a[0] when there are fewer than step + 1
+        # players per group, so replay it
+        group_a = collections.deque(players[:half])
+        group_b = collections.deque(players[half:])
+        for _ in range(round_idx):
+            last_players_a = [group_a.pop() for _ in range(step)]
+            first_players_b = [group_b.popleft() for _ in range(step)]
+            for player in first_players_b:
+                group_a.insert(1, player)
+            group_b.extend(last_players_a)
+        return list(group_a), list(group_b)
+
+    ring = players[1:half] + players[: half - 1 : -1]
+    ring_size = len(ring)
+    shift = (step * round_idx) % ring_size
+    ring = ring[ring_size - shift :] + ring[: ring_size - shift]
+    return [players[0]] + ring[: half - 1], ring[: half - 2 : -1]
+
+
+async def americano_round(players, round_idx):
+    """
+    Create the single player matches of one round of americano.
+    Args:
+        players: List of player ids with an even number of entries, None for a bye
+        round_idx: int
+    Returns:
+        round_matches: List of matches
+    """
+
+    group_a, group_b = await rotation_groups(players, round_idx, 2)
+    round_matches = []
+    for i in range(len(players) // 4):
+        player_a = group_a[i]
+        player_a1 = group_a[i + 1]
+        player_b = group_b[i]
+        player_b1 = group_b[i + 1]
+        if (
+            player_a is not None
+            and player_b is not None
+            and player_a1 is not None
+            and player_b1 is not None
+        ):
+            round_matches.append([(player_a, player_a1), (player_b, player_b1)])
+    return round_matches
+
+
+async def team_americano_round(players, round_idx):
+    """
+    Create the team matches of one round of team americano.
+    Args:
+        players: List of teams with an even number of entries, None for a bye
+        round_idx: int
+    Returns:
+        round_matches: List of matches
+    """
+
+    group_a, group_b = await rotation_groups(players, round_idx, 1)
+    return [
+        [player_a, player_b]
+        for player_a, player_b in zip(group_a, group_b)
+        if player_a is not None and player_b is not None
+    ]
 
 
 async def americano(players):
@@ -21,38 +131,12 @@ async def americano(players):
         matches: List of matches
     """
 
-    num_players = len(players)
-    if num_players % 2 != 0:
-        players.append(None)
-        num_players += 1
-    group_a = players[: num_players // 2]
-    group_b = players[num_players // 2 :]
-    num_rounds = num_players - 1
-    matches = []
-    for _ in range(num_rounds):
-        round_matches = []
-        for i in range(num_players // 4):
-            player_a = group_a[i]
-            player_a1 = group_a[i + 1]
-            player_b = group_b[i]
-            player_b1 = group_b[i + 1]
-            if (
-                player_a is not None
-                and player_b is not None
-                and player_a1 is not None
-                and player_b1 is not None
-            ):
-                round_matches.append([(player_a, player_a1), (player_b, player_b1)])
-        matches.append(round_matches)
-        last_player_a = group_a.pop()
-        last_player_a1 = group_a.pop()
-        last_player_b = group_b.pop(0)
-        last_player_b1 = group_b.pop(0)
-        group_a.insert(1, last_player_b)
-        group_a.insert(1, last_player_b1)
-        group_b.append(last_player_a)
-        group_b.append(last_player_a1)
-    return matches
+    if len(players) % 2 != 0:
+        players = players + [None]
+    return [
+        await americano_round(players, round_idx)
+        for round_idx in range(len(players) - 1)
+    ]
 
 
 async def team_americano(players):
@@ -65,27 +149,12 @@ async def team_americano(players):
         matches: List of matches
     """
 
-    num_players = len(players)
-    if num_players % 2 != 0:
-        players.append(None)
-        num_players += 1
-    group_a = players[: num_players // 2]
-    group_b = players[num_players // 2 :]
-    num_rounds = num_players - 1
-    matches = []
-    for _ in range(num_rounds):
-        round_matches = []
-        for i in range(num_players // 2):
-            player_a = group_a[i]
-            player_b = group_b[i]
-            if player_a is not None and player_b is not None:
-                round_matches.append([player_a, player_b])
-        matches.append(round_matches)
-        last_player_a = group_a.pop()
-        last_player_b = group_b.pop(0)
-        group_a.insert(1, last_player_b)
-        group_b.append(last_player_a)
-    return matches
+    if len(players) % 2 != 0:
+        players = players + [None]
+    return [
+        await team_americano_round(players, round_idx)
+        for round_idx in range(len(players) - 1)
+    ]
 
 
 async def mexicano(players, team=False, matches=None):
@@ -115,19 +184,77 @@ async def mexicano(players, team=False, matches=None):
     return matches
 
 
-async def americano_rounds(matches, court_ids, no_courts):
+async def balanced_mexicano(players, team=False, rounds=None):
+    """
+    Create matches of the next mexicano round from the standings, avoiding partners
+    and opponents the players already had and rotating sit outs when the number of
+    players is not a multiple of the group size. Without earlier rounds this gives
+    the same matches as mexicano.
+    Args:
+        players: List of [player, score] sorted from the highest score.
+        Player is a list of two player ids for team games or a player id otherwise.
+        team: bool
+        rounds: stored rounds played so far
+    Returns:
+        matches: List of matches
+    """
+
+    standings_index = await get_participant_index([player[0] for player in players])
+    history = []
+    for _round in rounds or []:
+        round_sides = []
+        for match in _round:
+            if team:
+                round_sides.append(
+                    [
+                        [standings_index[(_team["player_1"], _team["player_2"])]]
+                        for _team in match["teams"]
+                    ]
+                )
+            else:
+                round_sides.append(
+                    [
+                        [
+                            standings_index[_team["player_1"]],
+                            standings_index[_team["player_2"]],
+                        ]
+                        for _team in match["teams"]
+                    ]
+                )
+        history.append(round_sides)
+    partner_counts, opponent_counts, sit_out_counts = (
+        mexicano_pairing.pairing_history(history, len(players))
+    )
+    pairs, _ = mexicano_pairing.pair_round(
+        [player[1] for player in players],
+        partner_counts,
+        opponent_counts,
+        sit_out_counts,
+        team=team,
+    )
+    if team:
+        return [
+            [players[side_1[0]][0], players[side_2[0]][0]] for side_1, side_2 in pairs
+        ]
+    return [
+        [tuple(players[p][0] for p in side_1), tuple(players[p][0] for p in side_2)]
+        for side_1, side_2 in pairs
+    ]
+
+
+async def americano_rounds(matches, court_ids, no_courts, court_assigned=0):
     """
     Create rounds for americano.
     Args:
         matches: List of matches
         court_ids: List of court ids
         no_courts: Number of available courts
+        court_assigned: Index of the court for the first match
     Returns:
         rounds: List of rounds
     """
 
     rounds = []
-    court_assigned = 0
     # Get court ids
 
     for item in matches:
@@ -240,30 +367,142 @@ async def get_players(activity_record_id: str):
         List of players/ List of lists of players
     """
 
-    players_info = mongodb_client[DBInfo.database][CollInfo.activity_records].find_one(
+    players_info = await repository.activity_records.find_one(
         {"_id": ObjectId(activity_record_id)}, {"players": 1}
     )
     assert players_info is not None, "No player list found."
     return players_info["players"]
 
 
-async def get_court_ids(activity_record_id: str):
+async def get_tournament_context(
+    activity_record_id: str, round_start: int = 0, round_end: Optional[int] = None
+):
     """
-    Get a list of court_ids for the given activity record id.
+    Get the activity record, its booking and its activity history with one aggregation.
+    Only rounds from round_start up to round_end are returned, the number of stored
+    rounds is returned as record.materialized_rounds.
     Args:
         activity_record_id: str
+        round_start: int
+        round_end: int, all rounds after round_start if None
+    Returns:
+        activity_record: activity_records document
+        activity_booking: tournaments document
+        activity_history: schemas.ActivityHistory or None if no schedule exists
+    """
+
+    history_pipeline = [
+        {"$unset": ["record.standings", "record.leaderboard"]},
+        {"$set": {"record.materialized_rounds": {"$size": "$record.rounds"}}},
+    ]
+    if round_start != 0 or round_end is not None:
+        history_pipeline.append(
+            {
+                "$set": {
+                    "record.rounds": {
+                        "$slice": [
+                            "$record.rounds",
+                            round_start,
+                            {"$max": [1, "$record.materialized_rounds"]}
+                            if round_end is None
+                            else round_end - round_start,
+                        ]
+                    }
+                }
+            }
+        )
+    context = await repository.activity_records.aggregate(
+        [
+            {"$match": {"_id": ObjectId(activity_record_id)}},
+            {
+                "$addFields": {
+                    "_activity_record_id": {"$toString": "$_id"},
+                    "_activity_id": {"$toObjectId": "$activity_id"},
+                }
+            },
+            # localField together with a pipeline needs MongoDB 5.0
+            {
+                "$lookup": {
+                    "from": repository.tournament_matchmakings.collection_name,
+                    "localField": "_activity_record_id",
+                    "foreignField": "activity_record_id",
+                    "pipeline": history_pipeline,
+                    "as": "_activity_history",
+                }
+            },
+            {
+                "$lookup": {
+                    "from": repository.tournaments.collection_name,
+                    "localField": "_activity_id",
+                    "foreignField": "_id",
+                    "as": "_activity_booking",
+                }
+            },
+        ]
+    )
+    assert (
+        context
+    ), f"Could not find the activity record for activity id: {activity_record_id}"
+    activity_record = context[0]
+    activity_history = activity_record.pop("_activity_history")
+    activity_booking = activity_record.pop("_activity_booking")
+    del activity_record["_activity_record_id"], activity_record["_activity_id"]
+    assert (
+        activity_booking
+    ), f"Could not find the booking for activity id: {activity_record['activity_id']}"
+    return (
+        activity_record,
+        activity_booking[0],
+        activity_history[0] if activity_history else None,
+    )
+
+
+async def make_americano_rounds(
+    tournament_type, players, court_ids, no_courts, round_start=0, round_end=None
+):
+    """
+    Creates a range of rounds for americano and team americano. Court assignment
+    continues from where the matches of the rounds before round_start left off.
+    Args:
+        tournament_type: any from -> ["Americano", "Team Americano"]
+        players: List of players/ List of lists of players
+        court_ids: List of court ids
+        no_courts: Number of available courts
+        round_start: int, first round to create
+        round_end: int, round to stop before, all remaining rounds if None
     Returns:
-        List of court_ids
+        List of rounds
     """
 
-    court_ids_info = mongodb_client[DBInfo.database][
-        CollInfo.activity_records
-    ].find_one({"_id": ObjectId(activity_record_id)}, {"court_ids": 1})
-    assert court_ids_info is not None, "No court id found."
-    return court_ids_info["court_ids"]
+    if len(players) % 2 != 0:
+        players = players + [None]
+    make_round = (
+        americano_round if tournament_type == "Americano" else team_americano_round
+    )
+    no_rounds = len(players) - 1
+    round_end = no_rounds if round_end is None else min(round_end, no_rounds)
+    matches = [
+        await make_round(players, round_idx)
+        for round_idx in range(round_start, round_end)
+    ]
+    # A bye drops the match it lands in, so earlier rounds are counted then
+    if None in players:
+        matches_before = sum(
+            [
+                len(await make_round(players, round_idx))
+                for round_idx in range(round_start)
+            ]
+        )
+    else:
+        matches_before = round_start * len(matches[0]) if matches else 0
+    return await americano_rounds(
+        matches, court_ids, no_courts, matches_before % no_courts
+    )
 
 
-async def make_rounds(tournament_type, players, court_ids, no_courts):
+async def make_rounds(
+    tournament_type, players, court_ids, no_courts, round_start=0, round_end=None
+):
     """
     Creates rounds according to tournament type.
     Args:
@@ -271,22 +510,22 @@ async def make_rounds(tournament_type, players, court_ids, no_courts):
         players: List of players/ List of lists of players
         court_ids: List of court_ids
         no_courts: Number of available courts
+        round_start: int, first americano round to create
+        round_end: int, americano round to stop before, all remaining rounds if None
     Returns:
         List of rounds
     """
-    if tournament_type == "Americano":
-        matches = await americano(players)
-        rounds = await americano_rounds(matches, court_ids, no_courts)
-    if tournament_type == "Team Americano":
-        matches = await team_americano(players)
-        rounds = await americano_rounds(matches, court_ids, no_courts)
+    if tournament_type in ["Americano", "Team Americano"]:
+        rounds = await make_americano_rounds(
+            tournament_type, players, court_ids, no_courts, round_start, round_end
+        )
     if tournament_type == "Mexicano":
         players_score = [[player, 0] for player in players]
-        matches = await mexicano(players_score, False)
+        matches = await balanced_mexicano(players_score, False)
         rounds = await mexicano_rounds(matches, court_ids, no_courts, False)
     if tournament_type == "Team Mexicano":
         players_score = [[player, 0] for player in players]
-        matches = await mexicano(players_score, True)
+        matches = await balanced_mexicano(players_score, True)
         rounds = await mexicano_rounds(matches, court_ids, no_courts, True)
 
     return rounds
@@ -356,8 +595,12 @@ async def base_activity_history(
             "no_rounds": 0,
             "match_per_round": 0,
             "court_ids": None,
+            "schedule_version": 0,
             "number_of_points": number_of_points,
+            "participants": [],
             "summary": [],
+            "standings": [],
+            "leaderboard": [],
             "rounds": [],
         },
     }
@@ -376,22 +619,29 @@ async def create_summary(players, summary=None):
     if summary is None:
         summary = []
     team = True if type(players[0]) == list else False
+    player_infos = await internal.get_player_infos(
+        list(itertools.chain.from_iterable(players)) if team else players
+    )
 
     for player in players:
         if team:
             player_info = [
-                await internal.get_player_info(player[0]),
-                await internal.get_player_info(player[1]),
+                player_infos[player[0]],
+                player_infos[player[1]],
             ]
         else:
             player_info = [
-                await internal.get_player_info(player),
+                player_infos[player],
             ]
 
         summary.append(
             {
                 "player_info": player_info,
-                "matches": [],
+                "matches_played": 0,
+                "matches_won": 0,
+                "matches_drawn": 0,
+                "matches_lost": 0,
+                "results": [],
                 "points_won": 0,
                 "points_lost": 0,
                 "total_points_played": 0,
@@ -401,45 +651,31 @@ async def create_summary(players, summary=None):
     return summary
 
 
-async def max_player_check(activity_id: str, current_max: int):
-    """
-    Check if the max player count has changed.
-
-    Args:
-       activity_id: str
-       current_max: int
-
-    Returns:
-        bool
-    """
-    activity_booking = mongodb_client[DBInfo.database][CollInfo.tournaments].find_one(
-        {"_id": ObjectId(activity_id)}
-    )
-    assert (
-        activity_booking is not None
-    ), f"Could not find the booking for activity id: {activity_id}"
-    return activity_booking["no_of_players"] != current_max
-
-
-async def create_activity_history(activity_record_id: str):
+async def create_activity_history(
+    activity_record_id: str, activity_record=None, activity_booking=None
+):
     """
     Creates activity history given activity_record_id.
     Args:
         activity_record_id: str
+        activity_record: activity_records document, fetched if not given
+        activity_booking: tournaments document, fetched if not given
     Returns:
         schemas.ActivityHistory
     """
 
     # Get booking and activity information
-    activity_record = mongodb_client[DBInfo.database][
-        CollInfo.activity_records
-    ].find_one({"_id": ObjectId(activity_record_id)})
+    if activity_record is None:
+        activity_record = await repository.activity_records.find_one(
+            {"_id": ObjectId(activity_record_id)}
+        )
     assert (
         activity_record is not None
     ), f"Could not find the activity record for activity id: {activity_record_id}"
-    activity_booking = mongodb_client[DBInfo.database][CollInfo.tournaments].find_one(
-        {"_id": ObjectId(activity_record["activity_id"])}
-    )
+    if activity_booking is None:
+        activity_booking = await repository.tournaments.find_one(
+            {"_id": ObjectId(activity_record["activity_id"])}
+        )
     assert (
         activity_booking is not None
     ), f"Could not find the booking for activity id: {activity_record['activity_id']}"
@@ -459,12 +695,31 @@ async def create_activity_history(activity_record_id: str):
     # Get max players
     activity_history["record"]["max_players"] = activity_booking["no_of_players"]
 
+    # Remember which roster and court version the schedule is built from
+    activity_history["record"]["schedule_version"] = activity_record.get(
+        "schedule_version", 0
+    )
+
     # Get players or teams
-    players = await get_players(activity_record_id)
+    players = activity_record["players"]
     activity_history["record"]["no_participants"] = len(players)
+    activity_history["record"]["participants"] = list(players)
 
     # Create summary
     activity_history["record"]["summary"] = await create_summary(players)
+    # Every participant starts tied, in summary order
+    activity_history["record"]["standings"] = [
+        {"participant": idx, "points": 0, "rank": idx + 1}
+        for idx in range(len(players))
+    ]
+    activity_history["record"]["leaderboard"] = [
+        dict(await leaderboard_entry(idx, summary_entry), rank=idx + 1)
+        for idx, summary_entry in enumerate(activity_history["record"]["summary"])
+    ]
+    # Every score bumps summary_version, standings_version is the summary_version
+    # the standings and leaderboard were ranked from
+    activity_history["record"]["summary_version"] = 0
+    activity_history["record"]["standings_version"] = 0
 
     # Court assignment
     no_courts = len(activity_record["court_ids"])
@@ -484,6 +739,12 @@ async def create_activity_history(activity_record_id: str):
             activity_booking["tournament_type"],
             activity_history["record"]["no_participants"],
         )
+    # Every result word exists up front, so concurrent scores only $inc them
+    for summary_entry in activity_history["record"]["summary"]:
+        summary_entry["results"] = [0] * await get_no_of_result_words(
+            activity_history["record"]["no_rounds"],
+            activity_history["record"]["match_per_round"],
+        )
 
     # Create rounds
     # Schedule is empty if requirement for total number of players is not met
@@ -500,6 +761,7 @@ async def create_activity_history(activity_record_id: str):
                 players,
                 activity_history["record"]["court_ids"],
                 no_courts,
+                round_end=INITIAL_ROUNDS,
             )
 
         elif activity_booking["tournament_type"] == "Team Americano":
@@ -508,14 +770,101 @@ async def create_activity_history(activity_record_id: str):
                 players,
                 activity_history["record"]["court_ids"],
                 no_courts,
+                round_end=INITIAL_ROUNDS,
             )
 
-    mongodb_client[DBInfo.database][CollInfo.tournament_matchmakings].insert_one(
-        activity_history
-    )
+    await repository.tournament_matchmakings.insert_one(activity_history)
     return activity_history
 
 
+async def materialize_rounds(
+    activity_record_id: str, tournament_info, materialized: int, round_end: int
+):
+    """
+    Store the americano rounds up to round_end that have not been created yet.
+    Mexicano rounds are only created once the previous round is played, and a
+    schedule without any stored round has not been made yet, so both are skipped.
+    Args:
+        activity_record_id: str
+        tournament_info: schemas.TournamentRecord
+        materialized: int, number of rounds already stored
+        round_end: int
+    Returns:
+        List of rounds from round `materialized` up to round_end, as stored
+    """
+
+    round_end = min(round_end, tournament_info["no_rounds"])
+    if (
+        tournament_info["tournament_type"] not in ["Americano", "Team Americano"]
+        or materialized == 0
+        or round_end <= materialized
+        or not tournament_info.get("participants")
+    ):
+        return []
+
+    rounds = await make_rounds(
+        tournament_info["tournament_type"],
+        tournament_info["participants"],
+        tournament_info["court_ids"],
+        len(tournament_info["court_ids"]),
+        round_start=materialized,
+        round_end=round_end,
+    )
+    if not rounds:
+        return []
+    result = await repository.tournament_matchmakings.update_one(
+        {
+            "activity_record_id": activity_record_id,
+            "record.rounds": {"$size": materialized},
+        },
+        {"$push": {"record.rounds": {"$each": rounds}}},
+    )
+    if result.matched_count == 0:
+        # Another request stored these rounds first, scores may already be set
+        stored = await repository.tournament_matchmakings.find_one(
+            {"activity_record_id": activity_record_id},
+            {"record.rounds": {"$slice": [materialized, len(rounds)]}},
+        )
+        assert stored is not None, "No record found for tournament."
+        rounds = stored["record"]["rounds"]
+        # It may have stopped at an earlier round, the rest is stored here
+        if rounds and materialized + len(rounds) < round_end:
+            rounds += await materialize_rounds(
+                activity_record_id,
+                tournament_info,
+                materialized + len(rounds),
+                round_end,
+            )
+    return rounds
+
+
+async def get_schedule_info(activity_record_id: str):
+    """
+    Get what is needed to materialize rounds without loading them.
+    Args:
+        activity_record_id: str
+    Returns:
+        schemas.TournamentRecord without rounds and summary, with materialized_rounds
+    """
+
+    schedule_info = await repository.tournament_matchmakings.aggregate(
+        [
+            {"$match": {"activity_record_id": activity_record_id}},
+            {
+                "$project": {
+                    "tournament_type": "$record.tournament_type",
+                    "no_rounds": "$record.no_rounds",
+                    "court_ids": "$record.court_ids",
+                    "participants": "$record.participants",
+                    "materialized_rounds": {"$size": "$record.rounds"},
+                }
+            },
+        ]
+    )
+    assert schedule_info, "No record found for tournament."
+    return schedule_info[0]
+
+
 async def delete_activity_history(activity_record_id: str):
     """
     Deletes activity history given activity_record_id.
@@ -523,29 +872,81 @@ async def delete_activity_history(activity_record_id: str):
         activity_record_id: str
     """
 
-    mongodb_client[DBInfo.database][CollInfo.tournament_matchmakings].delete_one(
+    await repository.tournament_matchmakings.delete_one(
         {"activity_record_id": activity_record_id}
     )
+    cache.invalidate_tournament(activity_record_id)
+
+
+async def get_participant_index(participants):
+    """
+    Map every participant to its position in the tournament summary.
+    Args:
+        participants: List of players/ List of lists of players, in summary order
+    Returns:
+        {player_id: summary_idx} or {(player_1, player_2): summary_idx} for teams
+    """
+
+    return {
+        tuple(participant) if type(participant) == list else participant: idx
+        for idx, participant in enumerate(participants)
+    }
+
+
+async def get_record_participants(activity_record_id: str, tournament_info):
+    """
+    Get the participants a schedule was made for, in summary order. Schedules made
+    before participants were stored fall back to the current activity record players.
+    Args:
+        activity_record_id: str
+        tournament_info: schemas.TournamentRecord
+    Returns:
+        List of players/ List of lists of players
+    """
 
+    if tournament_info.get("participants"):
+        return tournament_info["participants"]
+    return await get_players(activity_record_id)
 
-async def replace_court_and_player_id_with_name(activity_history):
+
+async def replace_court_and_player_id_with_name(activity_history, players=None):
     """
     Replace activity history court player id with info
 
     Args:
         activity_history: schemas.ActivityHistory
+        players: List of players/ List of lists of players, used for schedules
+            without stored participants and fetched if not given
 
     Returns:
         schemas.ActivityHistory
     """
-    players = await get_players(activity_history["activity_record_id"])
+    if not activity_history["record"]["rounds"]:
+        return activity_history
+    if activity_history["record"].get("participants"):
+        players = activity_history["record"]["participants"]
+    elif players is None:
+        players = await get_players(activity_history["activity_record_id"])
     team = type(players[0]) == list
+    participant_index = await get_participant_index(players)
+    court_infos = await internal.get_court_infos(
+        list(
+            {
+                _match["court_info"]
+                for _round in activity_history["record"]["rounds"]
+                for _match in _round
+            }
+        ),
+        activity_history["club_id"],
+    )
     for _round in activity_history["record"]["rounds"]:
         for _match in _round:
-            _match["court_info"] = await internal.get_court_info(_match["court_info"])
+            _match["court_info"] = court_infos[_match["court_info"]]
             for _team in _match["teams"]:
                 if team:
-                    summary_idx = players.index([_team["player_1"], _team["player_2"]])
+                    summary_idx = participant_index[
+                        (_team["player_1"], _team["player_2"])
+                    ]
                     _team["player_1"] = activity_history["record"]["summary"][
                         summary_idx
                     ]["player_info"][0]
@@ -553,8 +954,8 @@ async def replace_court_and_player_id_with_name(activity_history):
                         summary_idx
                     ]["player_info"][1]
                 else:
-                    summary_idx_1 = players.index(_team["player_1"])
-                    summary_idx_2 = players.index(_team["player_2"])
+                    summary_idx_1 = participant_index[_team["player_1"]]
+                    summary_idx_2 = participant_index[_team["player_2"]]
                     _team["player_1"] = activity_history["record"]["summary"][
                         summary_idx_1
                     ]["player_info"][0]
@@ -565,91 +966,258 @@ async def replace_court_and_player_id_with_name(activity_history):
     return activity_history
 
 
-async def tournament_matchmaking_helper(activity_record_id: str):
+async def schedule_changed(activity_history, activity_record):
+    """
+    Check if the players or courts of the activity record changed since the schedule
+    was made. The participant count and court ids are always compared, so writes
+    that do not bump schedule_version are still noticed, and schedule_version
+    catches players swapped at the same count on schedules made since it existed.
+
+    Args:
+        activity_history: schemas.ActivityHistory
+        activity_record: activity_records document
+
+    Returns:
+        bool
+    """
+    if (
+        activity_history["record"]["no_participants"] != len(activity_record["players"])
+        or activity_history["record"]["court_ids"] != activity_record["court_ids"]
+    ):
+        return True
+    return "schedule_version" in activity_history["record"] and activity_history[
+        "record"
+    ]["schedule_version"] != activity_record.get("schedule_version", 0)
+
+
+async def tournament_matchmaking_helper(
+    activity_record_id: str, round_start: int = 0, round_end: Optional[int] = None
+):
     """
     Creates activity history if there's none, updates it if there's a change in participant
-    number or court id, fetches the activity history otherwise
+    number or court id, fetches the activity history otherwise. Only the rounds from
+    round_start up to round_end are returned, americano rounds in that range that
+    were not created yet are created.
 
     Args:
         activity_record_id: str
+        round_start: int
+        round_end: int, all rounds after round_start if None
     Returns:
         schemas.ActivityHistory
     """
     try:
-        activity_history = mongodb_client[DBInfo.database][
-            CollInfo.tournament_matchmakings
-        ].find_one({"activity_record_id": activity_record_id})
+        assert round_start >= 0, "round_start cannot be negative."
+        assert (
+            round_end is None or round_start < round_end
+        ), "round_end has to be after round_start."
+        cache_key = (activity_record_id, round_start, round_end)
+        cached = cache.activity_histories.get(cache_key)
+        if cached is not None:
+            return cached
+
+        (
+            activity_record,
+            activity_booking,
+            activity_history,
+        ) = await get_tournament_context(activity_record_id, round_start, round_end)
         # Create new schedule if one does not exist
         if activity_history is None:
-            activity_history = await create_activity_history(activity_record_id)
+            activity_history = await create_activity_history(
+                activity_record_id, activity_record, activity_booking
+            )
 
-        # If participant number, court id or max participant count changes recreate schedule
+        # If players, courts or max participant count changes recreate schedule
         elif (
-            activity_history["record"]["no_participants"]
-            != len(await get_players(activity_record_id))
-            or activity_history["record"]["court_ids"]
-            != await get_court_ids(activity_record_id)
-            or (
-                await max_player_check(
-                    activity_history["activity_id"],
-                    activity_history["record"]["max_players"],
-                )
-            )
+            await schedule_changed(activity_history, activity_record)
+            or activity_booking["no_of_players"]
+            != activity_history["record"]["max_players"]
         ):
 
             await delete_activity_history(activity_record_id)
-            activity_history = await create_activity_history(activity_record_id)
+            activity_history = await create_activity_history(
+                activity_record_id, activity_record, activity_booking
+            )
+
+        # A new schedule holds every stored round, a fetched one only the range
+        record = activity_history["record"]
+        if "materialized_rounds" in record:
+            materialized = record.pop("materialized_rounds")
+        else:
+            materialized = len(record["rounds"])
+            record["rounds"] = record["rounds"][round_start:round_end]
+        if round_end is None:
+            round_end = record["no_rounds"]
+        for round_idx, _round in enumerate(
+            await materialize_rounds(
+                activity_record_id, record, materialized, round_end
+            ),
+            start=materialized,
+        ):
+            if round_idx >= round_start:
+                record["rounds"].append(_round)
 
-        activity_history = await replace_court_and_player_id_with_name(activity_history)
+        activity_history = await replace_court_and_player_id_with_name(
+            activity_history, activity_record["players"]
+        )
+        # The response keeps a matches list per summary entry
+        for summary_entry in activity_history["record"]["summary"]:
+            summary_entry["matches"] = await summary_matches(summary_entry)
         # Just fetch schedule otherwise
-        return schemas.ActivityHistory(**activity_history)
+        activity_history = schemas.ActivityHistory(**activity_history)
+        cache.activity_histories.set(cache_key, activity_history)
+        return activity_history
     except Exception as e:
         utils.raise_exception(e=e)
 
 
+async def get_no_of_result_words(no_rounds, match_per_round):
+    """
+    Number of words that hold the results of every match of a schedule.
+    Args:
+        no_rounds: int
+        match_per_round: int
+    Returns:
+        int
+    """
+
+    return -(-no_rounds * int(match_per_round) // RESULTS_PER_WORD)
+
+
+async def get_match_result(summary_entry, match_no):
+    """
+    Get the result a summary entry had in a match.
+    Args:
+        summary_entry: schemas.TournamentSummary entry
+        match_no: int -> round_idx * match_per_round + match_idx
+    Returns:
+        int -> MATCH_NOT_PLAYED, MATCH_WON, MATCH_DRAWN or MATCH_LOST
+    """
+
+    word, shift = divmod(match_no, RESULTS_PER_WORD)
+    results = summary_entry.get("results", [])
+    if word >= len(results):
+        return MATCH_NOT_PLAYED
+    return (results[word] >> (shift * RESULT_BITS)) & RESULT_MASK
+
+
+def legacy_summary(summary):
+    """
+    Check if a summary was stored with per match lists instead of result counters.
+    Args:
+        summary: schemas.TournamentSummary, or {summary_idx: entry}
+    Returns:
+        bool
+    """
+
+    entries = summary.values() if isinstance(summary, dict) else summary
+    return any("matches_played" not in summary_entry for summary_entry in entries)
+
+
+async def summary_counters(summary_entry):
+    """
+    Played and won counters of a summary entry. Entries stored before the counters
+    existed only have a matches list, where a won match was stored as 0.
+    Args:
+        summary_entry: schemas.TournamentSummary entry
+    Returns:
+        matches_played: int, matches_won: int
+    """
+
+    if "matches_played" in summary_entry:
+        return summary_entry["matches_played"], summary_entry["matches_won"]
+    matches = summary_entry.get("matches", [])
+    return len(matches), matches.count(0)
+
+
+async def summary_matches(summary_entry):
+    """
+    Matches list of the response, 1 for every won and 0 for every other played
+    match in match order.
+    Args:
+        summary_entry: schemas.TournamentSummary entry
+    Returns:
+        List of int
+    """
+
+    if "matches_played" not in summary_entry:
+        return [1 - result for result in summary_entry.get("matches", [])]
+    return [
+        int(result == MATCH_WON)
+        for word in summary_entry["results"]
+        for result in (
+            (word >> (shift * RESULT_BITS)) & RESULT_MASK
+            for shift in range(RESULTS_PER_WORD)
+        )
+        if result != MATCH_NOT_PLAYED
+    ]
+
+
 async def update_tournament_summary(
     activity_record_id,
-    players,
+    participant_index,
     tournament_info,
+    summary_update,
     player_id,
     points_won,
     points_lost,
     points_played,
-    edit,
-    current_winner_team,
-    winner_team,
+    match_no,
+    result,
 ):
     """
-    Update tournament summary.
+    Update tournament summary in memory and add the matching targeted operators
+    for that summary entry to summary_update.
     Args:
         activity_record_id: str
-        players: List
+        participant_index: Dict, see get_participant_index
         tournament_info: scemas.TournamentRecord
+        summary_update: {"$set": {}, "$inc": {}}
         player_id: str
         points_won: int
         points_lost: int
         points_played: int
-        edit: bool
-        current_winner_team: int
-        winner_team: int
+        match_no: int -> round_idx * match_per_round + match_idx
+        result: int -> MATCH_WON, MATCH_DRAWN or MATCH_LOST
     Returns:
         tournament_info: scemas.TournamentRecord
     """
 
-    summary_idx = players.index(player_id)
-    if edit:
-        if current_winner_team == 0:
-            tournament_info["summary"][summary_idx]["matches"].remove(1)
-        else:
-            tournament_info["summary"][summary_idx]["matches"].remove(0)
-    if winner_team == 0:
-        tournament_info["summary"][summary_idx]["matches"].append(1)
+    summary_idx = participant_index[
+        tuple(player_id) if type(player_id) == list else player_id
+    ]
+    summary_entry = tournament_info["summary"][summary_idx]
+    summary_path = f"record.summary.{summary_idx}"
+
+    # An edit moves the match from the previous result counter to the new one
+    previous_result = await get_match_result(summary_entry, match_no)
+    counters = {"total_points_played": points_played}
+    if previous_result == MATCH_NOT_PLAYED:
+        counters["matches_played"] = 1
+    elif previous_result != result:
+        counters[MATCH_COUNTERS[previous_result]] = -1
+    if previous_result != result:
+        counters[MATCH_COUNTERS[result]] = 1
+    counters["points_won"] = points_won
+    counters["points_lost"] = points_lost
+    for field, value in counters.items():
+        summary_entry[field] += value
+        summary_update["$inc"][f"{summary_path}.{field}"] = value
+
+    # The result is kept at the bits of its match. Words past the end only exist
+    # for summaries whose results were not sized for the schedule.
+    word, shift = divmod(match_no, RESULTS_PER_WORD)
+    results = summary_entry["results"]
+    delta = (result - previous_result) << (shift * RESULT_BITS)
+    if word < len(results):
+        results[word] += delta
+        summary_update["$inc"][f"{summary_path}.results.{word}"] = delta
     else:
-        tournament_info["summary"][summary_idx]["matches"].append(0)
-
-    tournament_info["summary"][summary_idx]["points_won"] += points_won
-    tournament_info["summary"][summary_idx]["points_lost"] += points_lost
-    tournament_info["summary"][summary_idx]["total_points_played"] += points_played
+        while len(results) <= word:
+            summary_update["$set"][f"{summary_path}.results.{len(results)}"] = 0
+            results.append(0)
+        results[word] = delta
+        summary_update["$set"][f"{summary_path}.results.{word}"] = delta
 
     return tournament_info
 
@@ -709,9 +1277,7 @@ async def get_tournament_info(activity_record_id: str):
         schemas.TournamentRecord
     """
 
-    tournament_info = mongodb_client[DBInfo.database][
-        CollInfo.tournament_matchmakings
-    ].find_one(
+    tournament_info = await repository.tournament_matchmakings.find_one(
         {"activity_record_id": activity_record_id},
         {"record"},
     )
@@ -720,7 +1286,7 @@ async def get_tournament_info(activity_record_id: str):
 
 
 async def create_next_mexicano_round(
-    activity_record_id: str, round_idx: int, query: bool = False
+    activity_record_id: str, round_idx: int, query: bool = False, tournament_info=None
 ):
     """
     Create next round of mexicano if there are rounds left.
@@ -728,14 +1294,20 @@ async def create_next_mexicano_round(
         activity_record_id: str
         round_idx: int
         query: bool (To add a new round when specifically instructed)
+        tournament_info: schemas.TournamentRecord as stored, fetched if not given
     """
 
     # Get tournament info
-    tournament_info = await get_tournament_info(activity_record_id)
+    if tournament_info is None:
+        tournament_info = await get_tournament_info(activity_record_id)
     # Create new round for Mexicano and Team Mexicano
     create_round = True
     if tournament_info["tournament_type"] in ["Mexicano", "Team Mexicano"]:
-        if tournament_info["no_rounds"] == len(tournament_info["rounds"]) and not query:
+        # Only finishing the latest round creates the next one
+        if (
+            tournament_info["no_rounds"] == len(tournament_info["rounds"])
+            or round_idx != len(tournament_info["rounds"]) - 1
+        ) and not query:
             create_round = False
         for match in tournament_info["rounds"][round_idx]:
             if match["winner"] is None or not create_round:
@@ -743,15 +1315,23 @@ async def create_next_mexicano_round(
                 break
 
         if create_round:
-            players = await get_players(activity_record_id)
-            player_score = [
-                [player, info["points_won"]]
-                for player, info in zip(players, tournament_info["summary"])
-            ]
-
-            player_score.sort(key=operator.itemgetter(1), reverse=True)
+            players = await get_record_participants(activity_record_id, tournament_info)
+            # Standings that miss a score are ranked again from the summary
+            if rankings_current(tournament_info):
+                player_score = [
+                    [players[entry["participant"]], entry["points"]]
+                    for entry in tournament_info["standings"]
+                ]
+            else:
+                player_score = [
+                    [player, info["points_won"]]
+                    for player, info in zip(players, tournament_info["summary"])
+                ]
+                player_score.sort(key=operator.itemgetter(1), reverse=True)
             if tournament_info["tournament_type"] == "Mexicano":
-                matches = await mexicano(player_score, team=False)
+                matches = await balanced_mexicano(
+                    player_score, team=False, rounds=tournament_info["rounds"]
+                )
                 rounds = await mexicano_rounds(
                     matches,
                     tournament_info["court_ids"],
@@ -759,185 +1339,798 @@ async def create_next_mexicano_round(
                     False,
                 )
             else:
-                matches = await mexicano(player_score, team=True)
+                matches = await balanced_mexicano(
+                    player_score, team=True, rounds=tournament_info["rounds"]
+                )
                 rounds = await mexicano_rounds(
                     matches,
                     tournament_info["court_ids"],
                     len(tournament_info["court_ids"]),
                     True,
                 )
-            mongodb_client[DBInfo.database][
-                CollInfo.tournament_matchmakings
-            ].update_one(
-                {"activity_record_id": activity_record_id},
-                {"$push": {"record.rounds": rounds[0]}},
-            )
+            # Only one of several writers finishing the round adds the next one
+            new_round = rounds[0]
+            pushed = (
+                await repository.tournament_matchmakings.update_one(
+                    {
+                        "activity_record_id": activity_record_id,
+                        "record.rounds": {"$size": len(tournament_info["rounds"])},
+                    },
+                    {"$push": {"record.rounds": new_round}},
+                )
+            ).matched_count
+            cache.invalidate_tournament(activity_record_id)
+            if pushed:
+                live_feed.feed.publish(
+                    activity_record_id,
+                    "round",
+                    round_idx=len(tournament_info["rounds"]),
+                    matches=new_round,
+                )
 
             # TODO If no score has been updated in new round of mexicano, user can update previous round score
 
 
-async def update_score_db(
-    activity_record_id: str,
-    round_idx: int,
-    match_idx: int,
-    team_1_score: int,
-    team_2_score: int,
-):
-    """
-    Updates score of a match. Returns string declaring winner or states if the score can't be updated.
-    Args:
-        activity_record_id: str
+def standings_key(entry):
+    """Mexicano pairing order, highest points first, earlier participants on a tie."""
+    return (-entry["points"], entry["participant"])
+
+
+def leaderboard_key(entry):
+    """Bracket order, by points, point difference and matches won."""
+    return (
+        -entry["total_points"],
+        -entry["point_difference"],
+        -entry["matches_won"],
+        entry["participant"],
+    )
+
+
+async def leaderboard_entry(summary_idx, summary_entry):
+    """
+    Leaderboard counters of a summary entry.
+    Args:
+        summary_idx: int
+        summary_entry: schemas.TournamentSummary entry
+    Returns:
+        leaderboard entry without rank
+    """
+
+    matches_played, matches_won = await summary_counters(summary_entry)
+    return {
+        "participant": summary_idx,
+        "player_info": summary_entry["player_info"],
+        "total_matches": matches_played,
+        "matches_won": matches_won,
+        "point_difference": summary_entry["points_won"] - summary_entry["points_lost"],
+        "total_points": summary_entry["points_won"],
+    }
+
+
+def rankings_current(record):
+    """
+    Check that the stored standings and leaderboard include every stored score.
+    Args:
+        record: schemas.TournamentRecord, at least with its versions and rankings
+    Returns:
+        bool
+    """
+
+    return "leaderboard" in record and record.get("standings_version", 0) == record.get(
+        "summary_version", 0
+    )
+
+
+async def rankings_from_summary(summary):
+    """
+    Rank a summary for the mexicano pairing and for the brackets.
+    Args:
+        summary: schemas.TournamentSummary
+    Returns:
+        standings: List of {"participant", "points", "rank"}
+        leaderboard: schemas.TournamentBracket
+    """
+
+    standings = sorted(
+        [
+            {"participant": idx, "points": summary_entry["points_won"]}
+            for idx, summary_entry in enumerate(summary)
+        ],
+        key=standings_key,
+    )
+    return (
+        [dict(entry, rank=rank) for rank, entry in enumerate(standings, start=1)],
+        await brackets_from_summary(summary),
+    )
+
+
+async def rebuild_summary(activity_record_id: str, tournament_info):
+    """
+    Recompute the result counters, standings and leaderboard of a record from its
+    stored rounds. Points are kept as stored.
+    Args:
+        activity_record_id: str
+        tournament_info: schemas.TournamentRecord
+    Returns:
+        {"$set": ..., "$unset": ...} update for the record
+    """
+
+    participant_index = await get_participant_index(
+        await get_record_participants(activity_record_id, tournament_info)
+    )
+    words = await get_no_of_result_words(
+        tournament_info["no_rounds"], tournament_info["match_per_round"]
+    )
+    summary = []
+    for summary_entry in tournament_info["summary"]:
+        summary_entry = dict(summary_entry)
+        summary_entry.pop("matches", None)
+        summary_entry.update(
+            matches_played=0,
+            matches_won=0,
+            matches_drawn=0,
+            matches_lost=0,
+            results=[0] * words,
+        )
+        summary.append(summary_entry)
+    tournament_info = dict(tournament_info, summary=summary)
+
+    team_game = tournament_info["tournament_type"] in [
+        "Team Americano",
+        "Team Mexicano",
+    ]
+    for round_idx, _round in enumerate(tournament_info["rounds"]):
+        for match_idx, match in enumerate(_round):
+            if match["winner"] is None:
+                continue
+            for team in range(2):
+                if match["winner"] == "Draw":
+                    result = MATCH_DRAWN
+                elif match["winner"] == f"Team {team + 1}":
+                    result = MATCH_WON
+                else:
+                    result = MATCH_LOST
+                players = [
+                    match["teams"][team]["player_1"],
+                    match["teams"][team]["player_2"],
+                ]
+                for player_id in [players] if team_game else players:
+                    # Points are already stored, only the result is replayed
+                    await update_tournament_summary(
+                        None,
+                        participant_index,
+                        tournament_info,
+                        {"$set": {}, "$inc": {}},
+                        player_id,
+                        0,
+                        0,
+                        0,
+                        round_idx * int(tournament_info["match_per_round"])
+                        + match_idx,
+                        result,
+                    )
+
+    # Only the result fields are set, so arrivals stored meanwhile are kept
+    standings, leaderboard = await rankings_from_summary(summary)
+    summary_update = {
+        "$set": {
+            **{
+                f"record.summary.{summary_idx}.{field}": summary_entry[field]
+                for summary_idx, summary_entry in enumerate(summary)
+                for field in (
+                    "matches_played",
+                    "matches_won",
+                    "matches_drawn",
+                    "matches_lost",
+                    "results",
+                )
+            },
+            "record.standings": standings,
+            "record.leaderboard": leaderboard,
+            "record.summary_version": tournament_info.get("summary_version", 0),
+            "record.standings_version": tournament_info.get("summary_version", 0),
+        },
+        "$unset": {
+            f"record.summary.{summary_idx}.matches": ""
+            for summary_idx in range(len(summary))
+        },
+    }
+    return {operator: fields for operator, fields in summary_update.items() if fields}
+
+
+async def upgrade_legacy_summary(activity_record_id: str):
+    """
+    Replace the per match lists of a summary stored before the result counters
+    with the counters, before a score is applied to it. Only the first of several
+    writers upgrading the same record stores it.
+    Args:
+        activity_record_id: str
+    """
+
+    tournament_info = await get_tournament_info(activity_record_id)
+    if not legacy_summary(tournament_info["summary"]):
+        return
+    await repository.tournament_matchmakings.update_one(
+        {
+            "activity_record_id": activity_record_id,
+            "record.summary": {
+                "$elemMatch": {"matches_played": {"$exists": False}}
+            },
+        },
+        await rebuild_summary(activity_record_id, tournament_info),
+    )
+    cache.invalidate_tournament(activity_record_id)
+
+
+async def store_rankings(activity_record_id: str, record, standings, leaderboard):
+    """
+    Store the standings and leaderboard ranked from the summary of a record, unless
+    another score was written since it was read.
+    Args:
+        activity_record_id: str
+        record: schemas.TournamentRecord with its summary_version
+        standings: see rankings_from_summary
+        leaderboard: schemas.TournamentBracket
+    Returns:
+        bool, whether they were stored
+    """
+
+    result = await repository.tournament_matchmakings.update_one(
+        {
+            "activity_record_id": activity_record_id,
+            "record.summary_version": record.get(
+                "summary_version", {"$exists": False}
+            ),
+        },
+        {
+            "$set": {
+                "record.standings": standings,
+                "record.leaderboard": leaderboard,
+                "record.standings_version": record.get("summary_version", 0),
+            }
+        },
+    )
+    if not result.matched_count:
+        return False
+    cache.invalidate_tournament(activity_record_id)
+    return True
+
+
+async def update_rankings(
+    activity_record_id: str, summary_version: Optional[int] = None
+):
+    """
+    Store the standings and leaderboard of the current summary for the live feed,
+    unless they already include the write that made summary_version, and publish
+    the leaderboard entries that changed. Nothing is stored when another score
+    was written since the summary was read, its writer ranks it instead.
+    Args:
+        activity_record_id: str
+        summary_version: int, summary_version after the score to include, the
+            version read if None
+    """
+
+    tournament = await repository.tournament_matchmakings.find_one(
+        {"activity_record_id": activity_record_id},
+        {
+            "record.summary.player_info": 1,
+            "record.summary.matches_played": 1,
+            "record.summary.matches_won": 1,
+            "record.summary.points_won": 1,
+            "record.summary.points_lost": 1,
+            "record.summary_version": 1,
+            "record.standings_version": 1,
+            "record.leaderboard": 1,
+        },
+    )
+    assert tournament is not None, "No record found for tournament."
+    record = tournament["record"]
+    if summary_version is None:
+        summary_version = record.get("summary_version", 0)
+    if record.get("standings_version", 0) >= summary_version:
+        return
+    standings, leaderboard = await rankings_from_summary(record["summary"])
+    if not await store_rankings(activity_record_id, record, standings, leaderboard):
+        return
+    previous = {entry["participant"]: entry for entry in record.get("leaderboard", [])}
+    entries = [
+        entry for entry in leaderboard if previous.get(entry["participant"]) != entry
+    ]
+    if entries:
+        live_feed.feed.publish(activity_record_id, "leaderboard", entries=entries)
+
+
+async def build_score_update(
+    activity_record_id: str,
+    tournament_info,
+    participant_index,
+    round_idx: int,
+    match_idx: int,
+    team_1_score: int,
+    team_2_score: int,
+):
+    """
+    Validate a score and build the guarded update that applies it. The in-memory
+    tournament_info is updated as well so several scores can be built in a row.
+    Args:
+        activity_record_id: str
+        tournament_info: schemas.TournamentRecord
+        participant_index: Dict, see get_participant_index
         round_idx: int -> from 0 to len(rounds)
         match_idx: int -> from 0 to len(matches)
         team_1_score: int
         team_2_score: int
     Returns:
-        string -> [Team 1, Team 2, Draw, "Cannot Update"]
+        winner: string -> [Team 1, Team 2, Draw, "Cannot Update"]
+        score_filter: filter that only matches while the previous score is stored
+        score_update: update document with targeted $set and $inc operators
     """
-    try:
-        winner, team_1_winner, team_2_winner = await get_winner(
-            team_1_score, team_2_score
-        )
 
-        # Get tournament info
-        tournament_info = await get_tournament_info(activity_record_id)
+    winner, team_1_winner, team_2_winner = await get_winner(team_1_score, team_2_score)
 
-        if (
-            round_idx + 1 > tournament_info["no_rounds"]
-            or match_idx + 1 > tournament_info["match_per_round"]
-        ):
-            return "Cannot Update"
+    if (
+        round_idx < 0
+        or match_idx < 0
+        or round_idx + 1 > tournament_info["no_rounds"]
+        or match_idx + 1 > tournament_info["match_per_round"]
+    ):
+        return "Cannot Update", None, None
 
-        # Edit or update score flag
-        current_score_1 = tournament_info["rounds"][round_idx][match_idx]["teams"][0][
-            "team_score"
-        ]
-        current_score_2 = tournament_info["rounds"][round_idx][match_idx]["teams"][1][
-            "team_score"
-        ]
-        edit = True
-        if current_score_1 == 0 and current_score_2 == 0:
-            edit = False
-            curr_1_win = 0
-            curr_2_win = 0
+    # Edit or update score flag
+    match = tournament_info["rounds"][round_idx][match_idx]
+    current_score_1 = match["teams"][0]["team_score"]
+    current_score_2 = match["teams"][1]["team_score"]
+    edit = not (current_score_1 == 0 and current_score_2 == 0)
+
+    # If it is a previous round of mexicano score cannot be updated
+    if (
+        edit
+        and tournament_info["tournament_type"] in ["Mexicano", "Team Mexicano"]
+        and round_idx + 1
+        # A record from get_score_context only holds the scored match
+        != tournament_info.get("materialized_rounds", len(tournament_info["rounds"]))
+    ):
+        # TODO Created new round but no score has been updated yet
+        return "Cannot Update", None, None
+
+    # Only apply on top of the score this update was calculated from
+    match_path = f"record.rounds.{round_idx}.{match_idx}"
+    score_filter = {
+        f"{match_path}.teams.0.team_score": current_score_1,
+        f"{match_path}.teams.1.team_score": current_score_2,
+    }
+    score_update = {
+        "$set": {
+            f"{match_path}.winner": winner,
+            f"{match_path}.teams.0.team_score": team_1_score,
+            f"{match_path}.teams.1.team_score": team_2_score,
+        },
+        "$inc": {},
+    }
+    match["winner"] = winner
+    match["teams"][0]["team_score"] = team_1_score
+    match["teams"][1]["team_score"] = team_2_score
+
+    # Calculate points
+    points_won_t1 = (current_score_1 - team_1_score) * -1
+    points_lost_t1 = (current_score_2 - team_2_score) * -1
+    points_played = (
+        (current_score_1 + current_score_2) - (team_1_score + team_2_score)
+    ) * -1
+
+    team_game = tournament_info["tournament_type"] in [
+        "Team Americano",
+        "Team Mexicano",
+    ]
+    match_no = round_idx * int(tournament_info["match_per_round"]) + match_idx
+    for team in range(2):
+        if team == 0:
+            points_won = points_won_t1
+            points_lost = points_lost_t1
+            winner_team = team_1_winner
         else:
-            current_winner, curr_1_win, curr_2_win = await get_winner(
-                current_score_1, current_score_2
+            points_won = points_lost_t1
+            points_lost = points_won_t1
+            winner_team = team_2_winner
+        if winner == "Draw":
+            result = MATCH_DRAWN
+        else:
+            result = MATCH_WON if winner_team else MATCH_LOST
+
+        # A team has one summary entry, single players have one each
+        if team_game:
+            player_ids = [
+                [match["teams"][team]["player_1"], match["teams"][team]["player_2"]]
+            ]
+        else:
+            player_ids = [
+                match["teams"][team]["player_1"],
+                match["teams"][team]["player_2"],
+            ]
+        for player_id in player_ids:
+            tournament_info = await update_tournament_summary(
+                activity_record_id,
+                participant_index,
+                tournament_info,
+                score_update,
+                player_id,
+                points_won,
+                points_lost,
+                points_played,
+                match_no,
+                result,
             )
 
-        # If it is a previous round of mexicano score cannot be updated
-        if (
-            edit
-            and tournament_info["tournament_type"] in ["Mexicano", "Team Mexicano"]
-            and round_idx + 1 != len(tournament_info["rounds"])
-        ):
-            # TODO Created new round but no score has been updated yet
-            return "Cannot Update"
+    # Tells the rankings which scores they include
+    score_update["$inc"]["record.summary_version"] = 1
 
-        # Update score
-        mongodb_client[DBInfo.database][CollInfo.tournament_matchmakings].update_one(
-            {"activity_record_id": activity_record_id},
+    return (
+        winner,
+        score_filter,
+        {operator: fields for operator, fields in score_update.items() if fields},
+    )
+
+
+async def get_score_context(activity_record_id: str, round_idx: int, match_idx: int):
+    """
+    Get what scoring one match needs with one aggregation: the match, the summary
+    entries of its participants and the scalar fields, so the read does not grow
+    with the number of rounds. An americano round that was not
+    created yet is created first.
+    Args:
+        activity_record_id: str
+        round_idx: int
+        match_idx: int
+    Returns:
+        tournament_info: schemas.TournamentRecord with rounds as
+            {round_idx: {match_idx: match}} and summary as {summary_idx: entry},
+            the full record for schedules without stored participants, None if
+            the match does not exist
+        participant_index: Dict, see get_participant_index
+    """
+
+    rounds = "$record.rounds"
+    _round = {"$ifNull": [{"$arrayElemAt": [rounds, round_idx]}, []]}
+    match_stored = {"$ifNull": ["$_match", False]}
+    context = await repository.tournament_matchmakings.aggregate(
+        [
+            {"$match": {"activity_record_id": activity_record_id}},
+            {"$set": {"_match": {"$arrayElemAt": [_round, match_idx]}}},
+            # A team has one summary entry, single players have one each
             {
                 "$set": {
-                    f"record.rounds.{round_idx}.{match_idx}.winner": winner,
-                    f"record.rounds.{round_idx}.{match_idx}.teams.0.team_score": team_1_score,
-                    f"record.rounds.{round_idx}.{match_idx}.teams.1.team_score": team_2_score,
+                    "_participants": {
+                        "$cond": [
+                            {
+                                "$in": [
+                                    "$record.tournament_type",
+                                    ["Team Americano", "Team Mexicano"],
+                                ]
+                            },
+                            {
+                                "$map": {
+                                    "input": "$_match.teams",
+                                    "in": ["$$this.player_1", "$$this.player_2"],
+                                }
+                            },
+                            {
+                                "$reduce": {
+                                    "input": "$_match.teams",
+                                    "initialValue": [],
+                                    "in": {
+                                        "$concatArrays": [
+                                            "$$value",
+                                            ["$$this.player_1", "$$this.player_2"],
+                                        ]
+                                    },
+                                }
+                            },
+                        ]
+                    }
                 }
             },
+            {
+                "$project": {
+                    "_id": 0,
+                    "tournament_type": "$record.tournament_type",
+                    "no_rounds": "$record.no_rounds",
+                    "match_per_round": "$record.match_per_round",
+                    "materialized_rounds": {"$size": rounds},
+                    "match": "$_match",
+                    "participants_stored": {"$isArray": "$record.participants"},
+                    "summary": {
+                        "$map": {
+                            "input": {"$ifNull": ["$_participants", []]},
+                            "as": "participant",
+                            "in": {
+                                "$let": {
+                                    "vars": {
+                                        "idx": {
+                                            "$indexOfArray": [
+                                                "$record.participants",
+                                                "$$participant",
+                                            ]
+                                        }
+                                    },
+                                    "in": {
+                                        "participant": "$$participant",
+                                        "idx": "$$idx",
+                                        "entry": {
+                                            "$arrayElemAt": ["$record.summary", "$$idx"]
+                                        },
+                                    },
+                                }
+                            },
+                        }
+                    },
+                    # Only needed to create the round of a match not stored yet
+                    "participants": {
+                        "$cond": [match_stored, "$$REMOVE", "$record.participants"]
+                    },
+                    "court_ids": {
+                        "$cond": [match_stored, "$$REMOVE", "$record.court_ids"]
+                    },
+                }
+            },
+        ]
+    )
+    assert context, "No record found for tournament."
+    context = context[0]
+
+    if not context["participants_stored"]:
+        # Schedules made before participants were stored are scored on the full
+        # record
+        tournament_info = await get_tournament_info(activity_record_id)
+        if legacy_summary(tournament_info["summary"]):
+            await upgrade_legacy_summary(activity_record_id)
+            return await get_score_context(activity_record_id, round_idx, match_idx)
+        if round_idx >= len(tournament_info["rounds"]) or match_idx >= len(
+            tournament_info["rounds"][round_idx]
+        ):
+            return None, None
+        participant_index = await get_participant_index(
+            await get_record_participants(activity_record_id, tournament_info)
         )
-        players = await get_players(activity_record_id)
+        return tournament_info, participant_index
 
-        # Calculate points
-        points_won_t1 = (current_score_1 - team_1_score) * -1
-        points_lost_t1 = (current_score_2 - team_2_score) * -1
-        points_played = (
-            (current_score_1 + current_score_2) - (team_1_score + team_2_score)
-        ) * -1
+    if "match" not in context:
+        if round_idx < context["no_rounds"] and await materialize_rounds(
+            activity_record_id, context, context["materialized_rounds"], round_idx + 1
+        ):
+            return await get_score_context(activity_record_id, round_idx, match_idx)
+        return None, None
+
+    # Scores are only applied to summaries with result counters
+    if legacy_summary([entry["entry"] for entry in context["summary"]]):
+        await upgrade_legacy_summary(activity_record_id)
+        return await get_score_context(activity_record_id, round_idx, match_idx)
+
+    tournament_info = {
+        field: context[field]
+        for field in (
+            "tournament_type",
+            "no_rounds",
+            "match_per_round",
+            "materialized_rounds",
+        )
+        if field in context
+    }
+    tournament_info["rounds"] = {round_idx: {match_idx: context["match"]}}
+    tournament_info["summary"] = {
+        entry["idx"]: entry["entry"] for entry in context["summary"]
+    }
+    participant_index = {
+        tuple(entry["participant"])
+        if type(entry["participant"]) == list
+        else entry["participant"]: entry["idx"]
+        for entry in context["summary"]
+    }
+    return tournament_info, participant_index
 
-        # If it's a team game
-        if tournament_info["tournament_type"] in ["Team Americano", "Team Mexicano"]:
 
-            for team in range(2):
-                if team == 0:
-                    points_won = points_won_t1
-                    points_lost = points_lost_t1
-                    current_winner_team = curr_1_win
-                    winner_team = team_1_winner
-                    player_id = [
-                        tournament_info["rounds"][round_idx][match_idx]["teams"][0][
-                            "player_1"
-                        ],
-                        tournament_info["rounds"][round_idx][match_idx]["teams"][0][
-                            "player_2"
-                        ],
-                    ]
-                else:
-                    points_won = points_lost_t1
-                    points_lost = points_won_t1
-                    current_winner_team = curr_2_win
-                    winner_team = team_2_winner
-                    player_id = [
-                        tournament_info["rounds"][round_idx][match_idx]["teams"][1][
-                            "player_1"
-                        ],
-                        tournament_info["rounds"][round_idx][match_idx]["teams"][1][
-                            "player_2"
-                        ],
-                    ]
+def publish_score(
+    activity_record_id: str,
+    round_idx: int,
+    match_idx: int,
+    team_1_score: int,
+    team_2_score: int,
+    winner: str,
+):
+    """
+    Publish a stored score.
+    Args:
+        activity_record_id: str
+        round_idx: int
+        match_idx: int
+        team_1_score: int
+        team_2_score: int
+        winner: str
+    """
+
+    live_feed.feed.publish(
+        activity_record_id,
+        "score",
+        round_idx=round_idx,
+        match_idx=match_idx,
+        team_1_score=team_1_score,
+        team_2_score=team_2_score,
+        winner=winner,
+    )
+
+
+async def update_score_db(
+    activity_record_id: str,
+    round_idx: int,
+    match_idx: int,
+    team_1_score: int,
+    team_2_score: int,
+):
+    """
+    Updates score of a match. Returns string declaring winner or states if the score can't be updated.
+    Args:
+        activity_record_id: str
+        round_idx: int -> from 0 to len(rounds)
+        match_idx: int -> from 0 to len(matches)
+        team_1_score: int
+        team_2_score: int
+    Returns:
+        string -> [Team 1, Team 2, Draw, "Cannot Update"]
+    """
+    try:
+        # Get the match and what scoring it touches
+        tournament_info, participant_index = await get_score_context(
+            activity_record_id, round_idx, match_idx
+        )
+        if tournament_info is None:
+            return "Cannot Update"
 
-                # Updating team 1 score
+        winner, score_filter, score_update = await build_score_update(
+            activity_record_id,
+            tournament_info,
+            participant_index,
+            round_idx,
+            match_idx,
+            team_1_score,
+            team_2_score,
+        )
+        if score_update is None:
+            return winner
+
+        # Update the score and the summary in one atomic write, unless another
+        # score of this match was stored since it was read. Scores of other
+        # matches do not get in the way. The round is returned as stored after
+        # the write, with the scores of other matches stored meanwhile.
+        stored = await repository.tournament_matchmakings.find_one_and_update(
+            {"activity_record_id": activity_record_id, **score_filter},
+            score_update,
+            projection={
+                "record.summary_version": 1,
+                "record.rounds": {"$slice": [round_idx, 1]},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+        if stored is None:
+            return "Cannot Update"
+        cache.invalidate_tournament(activity_record_id)
+        publish_score(
+            activity_record_id,
+            round_idx,
+            match_idx,
+            team_1_score,
+            team_2_score,
+            winner,
+        )
+        # Rankings are only kept current for live feed subscribers, readers rank
+        # the summary and store the rankings otherwise
+        if live_feed.feed.subscriber_count(activity_record_id):
+            await update_rankings(
+                activity_record_id, stored["record"]["summary_version"]
+            )
+        # Only a score stored after every other match of the round reads the
+        # record for the next one. Scores finishing together may both see that,
+        # only one of them creates the round.
+        if tournament_info["tournament_type"] in [
+            "Mexicano",
+            "Team Mexicano",
+        ] and all(
+            match["winner"] is not None for match in stored["record"]["rounds"][0]
+        ):
+            await create_next_mexicano_round(activity_record_id, round_idx)
+        return winner
+    except Exception as e:
+        utils.raise_exception(e=e)
+
+
+async def update_scores_db(
+    activity_record_id: str,
+    scores: List[Tuple[int, int, int, int]],
+):
+    """
+    Updates the scores of several matches with one bulk write. Scores are validated
+    and applied in the given order, so a match can be listed again to edit it.
+    Args:
+        activity_record_id: str
+        scores: List of (round_idx, match_idx, team_1_score, team_2_score)
+    Returns:
+        List of string -> [Team 1, Team 2, Draw, "Cannot Update"], one per score
+    """
+    try:
+        winners = ["Cannot Update"] * len(scores)
 
-                tournament_info = await update_tournament_summary(
+        # Get tournament info, scores are only applied to result counters
+        tournament_info = await get_tournament_info(activity_record_id)
+        if legacy_summary(tournament_info["summary"]):
+            await upgrade_legacy_summary(activity_record_id)
+            tournament_info = await get_tournament_info(activity_record_id)
+        if scores:
+            tournament_info["rounds"].extend(
+                await materialize_rounds(
                     activity_record_id,
-                    players,
                     tournament_info,
-                    player_id,
-                    points_won,
-                    points_lost,
-                    points_played,
-                    edit,
-                    current_winner_team,
-                    winner_team,
+                    len(tournament_info["rounds"]),
+                    max(score[0] for score in scores) + 1,
                 )
+            )
+        participant_index = await get_participant_index(
+            await get_record_participants(activity_record_id, tournament_info)
+        )
 
-        # If it is not a team game
-        else:
-            for team in range(2):
-                if team == 0:
-                    points_won = points_won_t1
-                    points_lost = points_lost_t1
-                    current_winner_team = curr_1_win
-                    winner_team = team_1_winner
-                else:
-                    points_won = points_lost_t1
-                    points_lost = points_won_t1
-                    current_winner_team = curr_2_win
-                    winner_team = team_2_winner
-                for player_idx in ["player_1", "player_2"]:
-                    # Updating player 1 of team 1 score
-                    player_id = tournament_info["rounds"][round_idx][match_idx][
-                        "teams"
-                    ][team][player_idx]
-                    tournament_info = await update_tournament_summary(
-                        activity_record_id,
-                        players,
-                        tournament_info,
-                        player_id,
-                        points_won,
-                        points_lost,
-                        points_played,
-                        edit,
-                        current_winner_team,
-                        winner_team,
+        operations = []
+        submitted = []
+        rounds = tournament_info["rounds"]
+        for idx, score in enumerate(scores):
+            # Matches of rounds that were not created yet cannot be scored
+            round_idx, match_idx = score[0], score[1]
+            if not (
+                0 <= round_idx < len(rounds) and 0 <= match_idx < len(rounds[round_idx])
+            ):
+                continue
+            winner, score_filter, score_update = await build_score_update(
+                activity_record_id,
+                tournament_info,
+                participant_index,
+                *score,
+            )
+            winners[idx] = winner
+            if score_update is not None:
+                operations.append(
+                    UpdateOne(
+                        {"activity_record_id": activity_record_id, **score_filter},
+                        score_update,
                     )
-
-        # Update score
-        mongodb_client[DBInfo.database][CollInfo.tournament_matchmakings].update_one(
-            {"activity_record_id": activity_record_id},
-            {"$set": {"record.summary": tournament_info["summary"]}},
+                )
+                submitted.append(idx)
+        if not operations:
+            return winners
+
+        # Each update only matches while its match still holds the score it was
+        # built from
+        result = await repository.tournament_matchmakings.bulk_write(operations)
+        cache.invalidate_tournament(activity_record_id)
+        if result.matched_count != len(operations):
+            # Another write changed some of these matches, report what was stored
+            stored_info = await get_tournament_info(activity_record_id)
+            for idx in submitted:
+                round_idx, match_idx, team_1_score, team_2_score = scores[idx]
+                teams = stored_info["rounds"][round_idx][match_idx]["teams"]
+                if (
+                    teams[0]["team_score"] != team_1_score
+                    or teams[1]["team_score"] != team_2_score
+                ):
+                    winners[idx] = "Cannot Update"
+        stored = [idx for idx in submitted if winners[idx] != "Cannot Update"]
+        for idx in stored:
+            publish_score(activity_record_id, *scores[idx], winners[idx])
+        if not stored:
+            return winners
+
+        if live_feed.feed.subscriber_count(activity_record_id):
+            await update_rankings(activity_record_id)
+        # Create the next mexicano round once, after the batch
+        await create_next_mexicano_round(
+            activity_record_id, max(scores[idx][0] for idx in stored)
         )
-        await create_next_mexicano_round(activity_record_id, round_idx)
-        return winner
+        return winners
     except Exception as e:
         utils.raise_exception(e=e)
 
@@ -958,25 +2151,36 @@ async def update_court_db(
 
     try:
         # Get record
-        tournament_info = mongodb_client[DBInfo.database][
-            CollInfo.tournament_matchmakings
-        ].find_one(
-            {"activity_record_id": activity_record_id},
-            {"record.court_ids"},
-        )
-        assert tournament_info is not None, "No record found for tournament."
-
-        if court_id in tournament_info["record"]["court_ids"]:
-            # Update court
-            mongodb_client[DBInfo.database][
-                CollInfo.tournament_matchmakings
-            ].update_one(
-                {"activity_record_id": activity_record_id},
+        tournament_info = await get_schedule_info(activity_record_id)
+
+        if court_id in tournament_info["court_ids"]:
+            if round_idx < 0 or match_idx < 0:
+                return "Match not found."
+            # Create the round first if it was not stored yet
+            await materialize_rounds(
+                activity_record_id,
+                tournament_info,
+                tournament_info["materialized_rounds"],
+                round_idx + 1,
+            )
+            # Update court, a match that does not exist is not created
+            match_path = f"record.rounds.{round_idx}.{match_idx}"
+            result = await repository.tournament_matchmakings.update_one(
                 {
-                    "$set": {
-                        f"record.rounds.{round_idx}.{match_idx}.court_info": court_id
-                    }
+                    "activity_record_id": activity_record_id,
+                    match_path: {"$exists": True},
                 },
+                {"$set": {f"{match_path}.court_info": court_id}},
+            )
+            if result.matched_count == 0:
+                return "Match not found."
+            cache.invalidate_tournament(activity_record_id)
+            live_feed.feed.publish(
+                activity_record_id,
+                "court",
+                round_idx=round_idx,
+                match_idx=match_idx,
+                court_id=court_id,
             )
             return "Court updated."
         else:
@@ -985,41 +2189,166 @@ async def update_court_db(
         utils.raise_exception(e=e)
 
 
-async def get_tournament_brackets_db(activity_record_id: str):
+async def brackets_from_summary(summary):
     """
-    Get tournament bracket from summary
+    Rank a summary whose stored leaderboard is missing or misses a score.
+    Args:
+        summary: schemas.TournamentSummary
+    Returns:
+        schemas.TournamentBracket
+    """
+
+    brackets = sorted(
+        [
+            await leaderboard_entry(summary_idx, summary_entry)
+            for summary_idx, summary_entry in enumerate(summary)
+        ],
+        key=leaderboard_key,
+    )
+    return [dict(entry, rank=rank) for rank, entry in enumerate(brackets, start=1)]
+
+
+async def rank_summary(activity_record_id: str, record):
+    """
+    Rank a summary read without current rankings. The rankings are stored for the
+    next readers, unless live feed subscribers are there, whose leaderboard
+    updates are published by the score writers.
+    Args:
+        activity_record_id: str
+        record: schemas.TournamentRecord with its summary and summary_version
+    Returns:
+        schemas.TournamentBracket
+    """
+
+    standings, leaderboard = await rankings_from_summary(record["summary"])
+    if not live_feed.feed.subscriber_count(activity_record_id):
+        await store_rankings(activity_record_id, record, standings, leaderboard)
+    return leaderboard
+
+
+async def get_tournament_brackets_db(
+    activity_record_id: str, top_k: Optional[int] = None
+):
+    """
+    Get tournament bracket from the leaderboard
     Args:
         activity_records_id: str
+        top_k: int, only the first top_k entries if given
     Returns:
         schemas.TournamentBracket
     """
 
     # Get record
     try:
-        tournament_summary = mongodb_client[DBInfo.database][
-            CollInfo.tournament_matchmakings
-        ].find_one(
-            {"activity_record_id": activity_record_id},
-            {"record.summary"},
+        assert top_k is None or top_k >= 1, "top_k must be at least 1."
+        cache_key = (activity_record_id, top_k)
+        cached = cache.tournament_brackets.get(cache_key)
+        if cached is not None:
+            return cached
+
+        leaderboard = "$record.leaderboard"
+        tournament_summary = await repository.tournament_matchmakings.aggregate(
+            [
+                {"$match": {"activity_record_id": activity_record_id}},
+                {
+                    "$project": {
+                        "_id": 0,
+                        "leaderboard": leaderboard
+                        if top_k is None
+                        else {"$slice": [leaderboard, top_k]},
+                        # The summary is only read when there is no leaderboard
+                        # including every stored score
+                        "summary": {
+                            "$cond": [
+                                RANKINGS_CURRENT,
+                                "$$REMOVE",
+                                "$record.summary",
+                            ]
+                        },
+                        "summary_version": "$record.summary_version",
+                    }
+                },
+            ]
         )
-        assert tournament_summary is not None, "No summary found for tournament."
+        assert tournament_summary, "No summary found for tournament."
 
-        brackets = [
-            {
-                "player_info": item["player_info"],
-                "total_matches": len(item["matches"]),
-                "matches_won": sum(item["matches"]),
-                "point_difference": item["points_won"] - item["points_lost"],
-                "total_points": item["points_won"],
-            }
-            for item in tournament_summary["record"]["summary"]
-        ]
+        tournament_summary = tournament_summary[0]
+        if "summary" in tournament_summary:
+            brackets = (await rank_summary(activity_record_id, tournament_summary))[
+                :top_k
+            ]
+        else:
+            brackets = tournament_summary["leaderboard"]
+        cache.tournament_brackets.set(cache_key, brackets)
+        return brackets
+    except Exception as e:
+        utils.raise_exception(e=e)
 
-        return sorted(
-            brackets,
-            key=lambda e: (e["total_points"], e["point_difference"], e["matches_won"]),
-            reverse=True,
+
+async def get_player_bracket_db(activity_record_id: str, player_id: str):
+    """
+    Get the leaderboard entry and rank of the player or team a player is in.
+    Args:
+        activity_record_id: str
+        player_id: str
+    Returns:
+        schemas.TournamentBracket entry
+    """
+
+    try:
+        leaderboard = "$record.leaderboard"
+        tournament_summary = await repository.tournament_matchmakings.aggregate(
+            [
+                {"$match": {"activity_record_id": activity_record_id}},
+                {
+                    "$project": {
+                        "_id": 0,
+                        "bracket": {
+                            "$arrayElemAt": [
+                                {
+                                    "$filter": {
+                                        "input": leaderboard,
+                                        "cond": {
+                                            "$in": [
+                                                player_id,
+                                                "$$this.player_info.player_id",
+                                            ]
+                                        },
+                                    }
+                                },
+                                0,
+                            ]
+                        },
+                        "summary": {
+                            "$cond": [
+                                RANKINGS_CURRENT,
+                                "$$REMOVE",
+                                "$record.summary",
+                            ]
+                        },
+                        "summary_version": "$record.summary_version",
+                    }
+                },
+            ]
         )
+        assert tournament_summary, "No summary found for tournament."
+
+        tournament_summary = tournament_summary[0]
+        if "summary" in tournament_summary:
+            brackets = await rank_summary(activity_record_id, tournament_summary)
+            bracket = next(
+                (
+                    entry
+                    for entry in brackets
+                    if player_id
+                    in [player["player_id"] for player in entry["player_info"]]
+                ),
+                None,
+            )
+        else:
+            bracket = tournament_summary.get("bracket")
+        assert bracket is not None, f"{player_id} is not in the tournament."
+        return bracket
     except Exception as e:
         utils.raise_exception(e=e)
 
@@ -1033,9 +2362,7 @@ async def create_new_round_db(activity_record_id: str):
     """
     try:
         # Get record
-        tournament_summary = mongodb_client[DBInfo.database][
-            CollInfo.tournament_matchmakings
-        ].find_one(
+        tournament_summary = await repository.tournament_matchmakings.find_one(
             {"activity_record_id": activity_record_id},
             {"record"},
         )
@@ -1053,13 +2380,26 @@ async def create_new_round_db(activity_record_id: str):
                 activity_record_id, tournament_summary["record"]["no_rounds"] - 1, True
             )
 
-            # Update record
-            tournament_summary = mongodb_client[DBInfo.database][
-                CollInfo.tournament_matchmakings
-            ].update_one(
-                {"activity_record_id": activity_record_id},
-                {"$inc": {"record.no_rounds": 1}},
+            # Update record, with result words for the matches of the new round
+            record = tournament_summary["record"]
+            words = await get_no_of_result_words(
+                record["no_rounds"], record["match_per_round"]
             )
+            new_words = (
+                await get_no_of_result_words(
+                    record["no_rounds"] + 1, record["match_per_round"]
+                )
+                - words
+            )
+            round_update: Dict[str, Dict] = {"$inc": {"record.no_rounds": 1}}
+            if new_words:
+                round_update["$push"] = {
+                    "record.summary.$[].results": {"$each": [0] * new_words}
+                }
+            tournament_summary = await repository.tournament_matchmakings.update_one(
+                {"activity_record_id": activity_record_id}, round_update
+            )
+            cache.invalidate_tournament(activity_record_id)
             return "Created"
         return "Can only create round for Mexicano and Team Mexicano."
     except Exception as e:
@@ -1077,9 +2417,7 @@ async def get_player_list_tournament_db(activity_record_id: str):
     """
     try:
         # Get record
-        tournament = mongodb_client[DBInfo.database][
-            CollInfo.tournament_matchmakings
-        ].find_one(
+        tournament = await repository.tournament_matchmakings.find_one(
             {"activity_record_id": activity_record_id},
             {"record.summary"},
         )
@@ -1108,12 +2446,17 @@ async def update_participants_flag_db(
     try:
         player = player_id[0] if type(player_id) == list else player_id
         # Get record
-        mongodb_client[DBInfo.database][CollInfo.tournament_matchmakings].update_one(
+        result = await repository.tournament_matchmakings.update_one(
             {
                 "activity_record_id": activity_record_id,
                 "record.summary.player_info.player_id": player,
             },
             {"$set": {"record.summary.$.arrived": here}},
         )
+        cache.invalidate_tournament(activity_record_id)
+        if result.matched_count:
+            live_feed.feed.publish(
+                activity_record_id, "arrival", player_id=player_id, arrived=here
+            )
     except Exception as e:
         utils.raise_exception(e=e)